@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+#############################################################################
+# Author  : Jerome ODIER
+#
+# Email   : jerome.odier@lpsc.in2p3.fr
+#
+# Version : 1.0 beta (2013)
+#
+#############################################################################
+# Compares the recursive descent parser of `JsonParser` with its explicit
+# stack engine (`iterative = True`) on wide and deep documents, then
+# parses a document nested far beyond the recursion limit.
+#
+# usage: python benchmarks/parser_engine.py [size_in_bytes]
+#############################################################################
+
+import os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import jsonv.JsonParser
+
+#############################################################################
+
+def wide(size):
+	record = '{"id": %d, "name": "record %d", "tags": ["a", "b"], "score": 1.5e3, "ok": true, "none": null}'
+
+	result = []
+	length = 0
+
+	i = 0
+
+	while length < size:
+		item = record % (i, i)
+
+		result.append(item)
+		length += len(item) + 2
+
+		i += 1
+
+	return '{"records": [\n' + ',\n'.join(result) + '\n]}'
+
+#############################################################################
+
+def deep(size, depth = 100):
+	item = '{"a": [' * depth + '1' + ']}' * depth
+
+	return '{"records": [\n' + ',\n'.join([item] * max(1, size // len(item))) + '\n]}'
+
+#############################################################################
+
+def measure(s, iterative, repeat = 3):
+	result = None
+
+	for i in xrange(repeat):
+		t = time.time()
+		jsonv.JsonParser.parseString(s, iterative = iterative)
+		t = time.time() - t
+
+		if result is None or t < result:
+			result = t
+
+	return result
+
+#############################################################################
+
+def main():
+
+	if len(sys.argv) > 1:
+		size = int(sys.argv[1])
+	else:
+		size = 1 << 20
+
+	#####################################################################
+
+	print('%8s %12s %14s %14s %8s' % ('input', 'size', 'recursive (s)', 'iterative (s)', 'speedup'))
+
+	for name, s in [('wide', wide(size)), ('deep', deep(size))]:
+
+		assert jsonv.JsonParser.parseString(s).to_python() == jsonv.JsonParser.parseString(s, iterative = True).to_python()
+
+		t1 = measure(s, False)
+		t2 = measure(s, True)
+
+		print('%8s %12d %14.4f %14.4f %7.2fx' % (name, len(s), t1, t2, t1 / t2))
+
+	#####################################################################
+
+	depth = 100000
+
+	s = '{"a": ' + '[' * depth + ']' * depth + '}'
+
+	try:
+		jsonv.JsonParser.parseString(s)
+
+		print('recursive: depth %d ok' % depth)
+
+	except RuntimeError:
+		print('recursive: depth %d fails (recursion limit)' % depth)
+
+	jsonv.JsonParser.parseString(s, iterative = True)
+
+	print('iterative: depth %d ok' % depth)
+
+	return 0
+
+#############################################################################
+
+if __name__ == '__main__':
+	sys.exit(main())
+
+#############################################################################
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+#############################################################################
+# Author  : Jerome ODIER
+#
+# Email   : jerome.odier@lpsc.in2p3.fr
+#
+# Version : 1.0 beta (2013)
+#
+#############################################################################
+# Compares the `regex` and `numpy` scanning engines of `JsonParser` on
+# UTF-8 documents of growing size and reports the crossover size, i.e.
+# the smallest document for which the numpy structural indexer wins.
+#
+# usage: python benchmarks/structural_index.py [max_size_in_bytes]
+#############################################################################
+
+import os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import jsonv.my_tokenizer, jsonv.structural, jsonv.JsonParser
+
+#############################################################################
+
+def document(size):
+	record = '{"id": %d, "name": "record %d", "tags": ["a", "b\\\\c"], "score": 1.5e3, "ok": true, "blob": "%s"}'
+
+	result = []
+	length = 0
+
+	i = 0
+
+	while length < size:
+		item = record % (i, i, 'x' * (i % 200))
+
+		result.append(item)
+		length += len(item) + 2
+
+		i += 1
+
+	return '{"records": [\n' + ',\n'.join(result) + '\n]}'
+
+#############################################################################
+
+def measure(f, s, repeat = 3):
+	result = None
+
+	for i in xrange(repeat):
+		t = time.time()
+		f(s)
+		t = time.time() - t
+
+		if result is None or t < result:
+			result = t
+
+	return result
+
+#############################################################################
+
+def main():
+
+	if jsonv.structural.numpy is None:
+		print('numpy is not installed')
+
+		return 1
+
+	if len(sys.argv) > 1:
+		max_size = int(sys.argv[1])
+	else:
+		max_size = 1 << 26
+
+	SPACES = jsonv.JsonParser.Tokenizer.SPACES
+	SYMBOLS = jsonv.JsonParser.Tokenizer.SYMBOLS
+	STRINGS = jsonv.JsonParser.Tokenizer.STRINGS
+
+	scanners = [
+		('regex', lambda s: jsonv.my_tokenizer.tokenize_spans(s, spaces = SPACES, symbols = SYMBOLS, strings = STRINGS)),
+		('numpy', lambda s: jsonv.structural.tokenize_spans(s, spaces = SPACES, symbols = SYMBOLS, strings = STRINGS)),
+	]
+
+	#####################################################################
+
+	print('%12s %12s %12s %12s %12s' % ('size', 'regex (s)', 'numpy (s)', 'regex MB/s', 'numpy MB/s'))
+
+	crossover = None
+
+	size = 1 << 10
+
+	while size <= max_size:
+		s = document(size)
+
+		assert scanners[0][1](s) == scanners[1][1](s)
+
+		t1 = measure(scanners[0][1], s)
+		t2 = measure(scanners[1][1], s)
+
+		print('%12d %12.4f %12.4f %12.1f %12.1f' % (len(s), t1, t2, len(s) / t1 / 1e6, len(s) / t2 / 1e6))
+
+		if crossover is None and t2 < t1:
+			crossover = len(s)
+
+		size <<= 1
+
+	#####################################################################
+
+	if crossover is None:
+		print('no crossover below %d bytes' % max_size)
+	else:
+		print('crossover: ~%d bytes' % crossover)
+
+	return 0
+
+#############################################################################
+
+if __name__ == '__main__':
+	sys.exit(main())
+
+#############################################################################
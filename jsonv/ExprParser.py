@@ -140,7 +140,14 @@ class Tokenizer(object):
 class Parser(object):
 	#####################################################################
 
-	def __init__(self, s, rule_keys, line = 1):
+	def __init__(self, s, rule_keys, line = 1, minimize = True, symbols = None, construction = 'thompson'):
+		#############################################################
+		# `symbols` maps each rule name to a dense integer id, the  #
+		# same for all the rules of a grammar (see `DenseDfa`)	    #
+		#############################################################
+
+		if symbols is None:
+			symbols = dict((rule_name, i) for i, rule_name in enumerate(sorted(rule_keys)))
 
 		if len(s.strip()) > 0:
 			self.tokenizer = Tokenizer(s, line = line)
@@ -149,7 +156,9 @@ class Parser(object):
 		else:
 			self.root = ((((((((((((((None))))))))))))))
 
-		self.table = self.dfa()
+		self.table = self.dfa(minimize = minimize, construction = construction)
+
+		self.dense = jsonv.nfa.DenseDfa(self.table, symbols)
 
 	#####################################################################
 
@@ -181,28 +190,15 @@ class Parser(object):
 		# term ::= suffix ( `,` suffix )+			    #
 		#############################################################
 
-		i = 0
-
-		suffixes = {}
+		suffixes = []
 
 		while True:
-			key = None
-
 			suffix = self.parseSuffix(rule_keys)
 
 			if suffix is None:
 				break
 
-			if   Node.isRule(suffix.nodeType):
-				key = rule_keys.get(suffix         .nodeValue)
-			elif Node.isOcOp(suffix.nodeType):
-				key = rule_keys.get(suffix.nodeLeft.nodeValue)
-
-			if key is None:
-				key = str(i)
-				i += 1
-
-			suffixes[key] = suffix
+			suffixes.append(suffix)
 
 			if self.tokenizer.hasNext() and Node.isAnd(self.tokenizer.peekType()):
 				self.tokenizer.next()
@@ -210,17 +206,20 @@ class Parser(object):
 				break
 
 		#############################################################
+		# The suffixes are chained in source order: object members  #
+		# may come in any order (see `Validator._validate_members`) #
+		#############################################################
 
 		left = None
 
-		for suffix_name in suffixes:
+		for suffix in suffixes:
 
 			if left is None:
-				left = suffixes[suffix_name]
+				left = suffix
 			else:
 				node = Node(Node.NODE_TYPE_AND)
 
-				right = suffixes[suffix_name]
+				right = suffix
 
 				node.nodeLeft = left
 				node.nodeRight = right
@@ -367,12 +366,142 @@ class Parser(object):
 
 	#####################################################################
 
-	def dfa(self):
+	def _glushkov(self, node, names, follow):
+		#############################################################
+		# Returns (nullable, first, last) for `node`. Each RULE	    #
+		# occurrence is a position, i.e. an index in `names`, and   #
+		# `follow` maps a position to the positions that may come   #
+		# next.							    #
+		#############################################################
+
+		#############################################################
+		# `|` operator						    #
+		#############################################################
+
+		if   node.nodeType == Node.NODE_TYPE_IOR:
+			nullable1, first1, last1 = self._glushkov(node.nodeLeft, names, follow)
+			nullable2, first2, last2 = self._glushkov(node.nodeRight, names, follow)
+
+			return nullable1 or nullable2, first1 | first2, last1 | last2
+
+		#############################################################
+		# `,` operator						    #
+		#############################################################
+
+		elif node.nodeType == Node.NODE_TYPE_AND:
+			nullable1, first1, last1 = self._glushkov(node.nodeLeft, names, follow)
+			nullable2, first2, last2 = self._glushkov(node.nodeRight, names, follow)
+
+			for position in last1:
+				follow[position] |= first2
+
+			if nullable1:
+				first1 = first1 | first2
+
+			if nullable2:
+				last2 = last2 | last1
+
+			return nullable1 and nullable2, first1, last2
+
+		#############################################################
+		# `?` operator						    #
+		#############################################################
+
+		elif node.nodeType == Node.NODE_TYPE_OPT:
+			nullable, first, last = self._glushkov(node.nodeRight, names, follow)
+
+			return True, first, last
+
+		#############################################################
+		# `+` & `*` operators					    #
+		#############################################################
+
+		elif node.nodeType == Node.NODE_TYPE_PLUS or node.nodeType == Node.NODE_TYPE_STAR:
+			nullable, first, last = self._glushkov(node.nodeRight, names, follow)
+
+			for position in last:
+				follow[position] |= first
+
+			return nullable or node.nodeType == Node.NODE_TYPE_STAR, first, last
+
+		#############################################################
+		# terminal (RULE)					    #
+		#############################################################
+
+		else:
+			position = len(names)
+
+			names.append(node.nodeValue)
+
+			follow.append(set())
+
+			return False, set([position]), set([position])
+
+	#####################################################################
+
+	def glushkov(self):
+		#############################################################
+		# Position automaton, without epsilon transitions: state 0  #
+		# is the initial state and state `p + 1` is reached after   #
+		# reading the RULE occurrence `p`. It accepts the same	    #
+		# language as the automaton built by _nfa() in dfa().	    #
+		#############################################################
+
+		result = jsonv.nfa.Nfa(0)
+
+		if self.root is None:
+			result.addFinalState(0)
+
+			return result
+
+		names = []
+		follow = []
+
+		nullable, first, last = self._glushkov(self.root, names, follow)
+
+		#############################################################
+		# a single RULE is repeated, as in dfa()		    #
+		#############################################################
+
+		if self.root.nodeType == Node.NODE_TYPE_RULE:
+			nullable = True
+
+			follow[0] |= first
+
+		#############################################################
+
+		for position in first:
+			result.addTransition(0, names[position], position + 1)
+
+		for position in xrange(len(names)):
+
+			for next_position in follow[position]:
+				result.addTransition(position + 1, names[next_position], next_position + 1)
+
+		for position in last:
+			result.addFinalState(position + 1)
+
+		if nullable:
+			result.addFinalState(0)
+
+		return result
+
+	#####################################################################
+
+	def dfa(self, minimize = True, construction = 'thompson'):
+		#############################################################
+		# `construction` is `thompson` (epsilon NFA, see _nfa())    #
+		# or `glushkov` (position automaton, see glushkov())	    #
+		#############################################################
+
 		cnt = RefValue()
 
 		result = jsonv.nfa.Nfa(0)
 
-		if not self.root is None:
+		if construction == 'glushkov':
+			result = self.glushkov()
+
+		elif not self.root is None:
 
 			if not self.root is None and self.root.nodeType != Node.NODE_TYPE_RULE:
 
@@ -388,7 +517,21 @@ class Parser(object):
 		else:
 			result.addFinalState(0x0)
 
-		return result.to_dfa()
+		#############################################################
+		# `states` is the number of states before and after the	    #
+		# minimization						    #
+		#############################################################
+
+		result = result.to_dfa()
+
+		before = result.countStates()
+
+		if minimize:
+			result = result.minimize()
+
+		self.states = (before, result.countStates())
+
+		return result
 
 	#####################################################################
 
@@ -397,8 +540,8 @@ class Parser(object):
 
 #############################################################################
 
-def parseString(s, rule_keys, line = 1):
-	return Parser(s, rule_keys, line = line)
+def parseString(s, rule_keys, line = 1, minimize = True, symbols = None, construction = 'thompson'):
+	return Parser(s, rule_keys, line = line, minimize = minimize, symbols = symbols, construction = construction)
 
 #############################################################################
 
@@ -15,7 +15,7 @@
 #   value ::= object | array | null | true | false | flt | str
 #############################################################################
 
-import sys, jsonv.my_tokenizer
+import re, sys, mmap, array, jsonv.my_tokenizer, jsonv.structural
 
 #############################################################################
 
@@ -24,15 +24,49 @@ class JsonParserError(Exception):
 
 #############################################################################
 
+_BRACKETS = re.compile('[\\x00-\\x03]')
+
+#############################################################################
+# Token types between two brackets of a container (see Tokenizer.skip),
+# by (is_object, after a nested value, before the closing bracket). The
+# types are chars: `{`, `}`, `[`, `]`, `:`, `,` are \x00-\x05, strings are
+# `g` and the other primitives are `f`, `h`, `i`, `j`.
+#############################################################################
+
+_SEGMENTS = [[[re.compile(pattern + '\\Z') for pattern in patterns] for patterns in L] for L in [
+	[
+		['(?:[f-j]\\x05)*', '(?:[f-j](?:\\x05[f-j])*\\x05?)?'],
+		['(?:\\x05[f-j])*\\x05', '(?:\\x05[f-j])*\\x05?'],
+	],
+	[
+		['(?:g\\x04[f-j]\\x05)*g\\x04', '(?:g\\x04[f-j](?:\\x05g\\x04[f-j])*\\x05?)?'],
+		['(?:\\x05g\\x04[f-j])*\\x05g\\x04', '(?:\\x05g\\x04[f-j])*\\x05?'],
+	],
+]]
+
+_NUMBER = re.compile('-?(?:0|[1-9][0-9]*)(\\.[0-9]+)?([eE][+-]?[0-9]+)?\\Z')
+
+#############################################################################
+
 def isFlt(s):
+	return not _NUMBER.match(s) is None
 
-	try:
-		float(s)
+#############################################################################
+
+def toNumber(s):
+	#####################################################################
+	# One scan of the number grammar, then one int or float conversion  #
+	#####################################################################
+
+	match = _NUMBER.match(s)
 
-		return True
+	if match is None:
+		return None
 
-	except ValueError:
-		return False
+	if match.group(1) is None and match.group(2) is None:
+		return int(s)
+	else:
+		return float(s)
 
 #############################################################################
 
@@ -41,6 +75,110 @@ def isStr(s):
 
 #############################################################################
 
+def getText(s, start, end):
+	result = s[start: end]
+
+	if isinstance(result, str):
+		result = result.decode('utf-8')
+
+	return result
+
+#############################################################################
+
+_ESCAPE = re.compile('\\\\(?:u([dD][89abAB][0-9a-fA-F]{2})\\\\u([dD][c-fC-F][0-9a-fA-F]{2})|u([0-9a-fA-F]{4})|(.))', re.DOTALL)
+
+_ESCAPES = {
+	'\'': '\'',
+	'\"': '\"',
+	'\\': '\\',
+	'/': '/',
+	'b': '\b',
+	'f': '\f',
+	'n': '\n',
+	'r': '\r',
+	't': '\t',
+}
+
+#############################################################################
+
+def _unescape(match):
+
+	if not match.group(1) is None:
+		hi = int(match.group(1), 16)
+		lo = int(match.group(2), 16)
+
+		try:
+			return unichr(0x10000 + ((hi - 0xD800) << 10) + (lo - 0xDC00))
+
+		except ValueError:
+			return unichr(hi) + unichr(lo)
+
+	if not match.group(3) is None:
+		return unichr(int(match.group(3), 16))
+
+	return _ESCAPES.get(match.group(4), match.group())
+
+#############################################################################
+
+def unescape(s):
+	#####################################################################
+	# Single pass over the escape sequences, nothing to do without `\\` #
+	#####################################################################
+
+	if s.find('\\') < 0:
+		return s
+	else:
+		return _ESCAPE.sub(_unescape, s)
+
+#############################################################################
+
+def unquote(s):
+
+	if s[0] == '\'' or s[0] == '\"':
+		s = unescape(s[1: -1])
+
+	return s
+
+#############################################################################
+
+_UNESCAPED = re.compile('[\\x00-\\x1F\"\\\\]')
+
+_UNESCAPES = {
+	'\"': '\\\"',
+	'\\': '\\\\',
+	'\b': '\\b',
+	'\f': '\\f',
+	'\n': '\\n',
+	'\r': '\\r',
+	'\t': '\\t',
+}
+
+#############################################################################
+
+def _escape(match):
+	c = match.group()
+
+	result = _UNESCAPES.get(c)
+
+	if result is None:
+		result = '\\u%04x' % ord(c)
+
+	return result
+
+#############################################################################
+
+def escape(s):
+	#####################################################################
+	# Inverse of `unescape`: the body of a JSON string literal	    #
+	#####################################################################
+
+	if _UNESCAPED.search(s) is None:
+		return s
+	else:
+		return _UNESCAPED.sub(_escape, s)
+
+#############################################################################
+
 def getType(s):
 
 	if   s == 'null':
@@ -72,55 +210,173 @@ class Tokenizer(object):
 
 	#####################################################################
 
-	def __init__(self, s, line = 1):
+	SPACES = [' ', '\t', '\n']
+	SYMBOLS = ['{', '}', '[', ']', ':', ',']
+	STRINGS = [['\'', '\''], ['\"', '\"']]
+
+	#####################################################################
+
+	SYMBOL_TYPES = {
+		'{': LBRACE,
+		'}': RBRACE,
+		'[': LBRACKET,
+		']': RBRACKET,
+		':': COLON,
+		',': COMMA,
+	}
+
+	#####################################################################
+	# Type of a token from its first character, but for words (103 is   #
+	# Value.TYPE_STR)						    #
+	#####################################################################
+
+	FIRST_TYPES = dict(SYMBOL_TYPES.items() + [('\'', 103), ('\"', 103)])
+
+	#####################################################################
+
+	def __init__(self, s, line = 1, raw = False, lazy_lines = False, engine = 'regex'):
+		#############################################################
+		# `raw` buffers (str, mmap) are UTF-8 and are scanned as is #
+		#############################################################
+
+		if raw == False:
+			s = unicode(s)
+
+		#############################################################
+		# SCANNING ENGINE					    #
+		#############################################################
+
+		if   engine == 'regex':
+			tokenize_spans = jsonv.my_tokenizer.tokenize_spans
+		elif engine == 'numpy':
+			tokenize_spans = jsonv.structural.tokenize_spans
+		else:
+			raise JsonParserError('invalid engine `%s`' % engine)
+
+		#############################################################
+		# TOKEN STREAM (ONE TYPED ARRAY PER FIELD)		    #
+		#############################################################
 
 		try:
-			self.tokens, self.lines = jsonv.my_tokenizer.tokenize(s, spaces = [' ', '\t', '\n'], symbols = ['{', '}', '[', ']', ':', ','], strings = [['\'', '\''], ['\"', '\"']], line = line)
+			self.starts, self.ends, self.lines = tokenize_spans(s, spaces = Tokenizer.SPACES, symbols = Tokenizer.SYMBOLS, strings = Tokenizer.STRINGS, line = line, track_lines = not lazy_lines)
 
-			self.types = []
+			self.types = array.array('B')
+			self.brackets = None
 
+			self.s = s
 			self.i = 0
 
+			self.line = line
+
+			if lazy_lines:
+				self.index = jsonv.my_tokenizer.LineIndex(s, line)
+			else:
+				self.index = None
+
 		except jsonv.my_tokenizer.TokenizerError, e:
 			raise JsonParserError(e.__str__())
 
-		for i in xrange(len(self.tokens)):
-
-			token = self.tokens[i]
-			line = self.lines[i]
-
-			if   token == '{':
-				self.types.append(Tokenizer.LBRACE)
-			elif token == '}':
-				self.types.append(Tokenizer.RBRACE)
-			elif token == '[':
-				self.types.append(Tokenizer.LBRACKET)
-			elif token == ']':
-				self.types.append(Tokenizer.RBRACKET)
-			elif token == ':':
-				self.types.append(Tokenizer.COLON)
-			elif token == ',':
-				self.types.append(Tokenizer.COMMA)
+		starts = self.starts
+		ends = self.ends
+
+		#############################################################
+		# The structural indexer types the symbols and strings in   #
+		# bulk, only its words are classified here		    #
+		#############################################################
+
+		if engine == 'numpy':
+			result = jsonv.structural.token_types(s, starts, Tokenizer.FIRST_TYPES)
+		else:
+			result = None
+
+		if not result is None:
+			self.types, words = result
+
+			for i in words:
+				TYPE = getType(s[starts[i]: ends[i]])
+
+				if TYPE < 0:
+					Tokenizer.unexpectedToken(getText(s, starts[i], ends[i]), self.getLine(i))
+
+				self.types[i] = TYPE
+
+			return
+
+		#############################################################
+
+		for i in xrange(len(starts)):
+
+			c = s[starts[i]]
+
+			if c == '\'' or c == '\"':
+				self.types.append(Value.TYPE_STR)
 			else:
-				TYPE = getType(token)
+				TYPE = Tokenizer.SYMBOL_TYPES.get(c)
 
-				if TYPE >= 0:
-					self.types.append(TYPE)
-				else:
-					if sys.platform in ['win32', 'win64']:
-						raise JsonParserError('syntax error, line `%d`, unexpected token `%s`' % (line, token))
-					else:
-						raise JsonParserError('syntax error, line `%d`, \033[31munexpected token `%s`\033[0m' % (line, token))
+				if TYPE is None:
+					#####################################
+					# classified without decoding       #
+					#####################################
+
+					TYPE = getType(s[starts[i]: ends[i]])
+
+					if TYPE < 0:
+						Tokenizer.unexpectedToken(getText(s, starts[i], ends[i]), self.getLine(i))
+
+				self.types.append(TYPE)
+
+	#####################################################################
+
+	@staticmethod
+	def getTokenType(token, line):
+
+		result = Tokenizer.SYMBOL_TYPES.get(token)
+
+		if result is None:
+			result = getType(token)
+
+			if result < 0:
+				Tokenizer.unexpectedToken(token, line)
+
+		return result
+
+	#####################################################################
+
+	@staticmethod
+	def unexpectedToken(token, line):
+
+		if sys.platform in ['win32', 'win64']:
+			raise JsonParserError('syntax error, line `%d`, unexpected token `%s`' % (line, token))
+		else:
+			raise JsonParserError('syntax error, line `%d`, \033[31munexpected token `%s`\033[0m' % (line, token))
+
+	#####################################################################
+
+	def getLine(self, i):
+
+		if self.lines is None:
+			return self.index.resolve(self.starts[i])
+		else:
+			return self.lines[i]
 
 	#####################################################################
 
 	def hasNext(self):
-		return self.i < len(self.tokens)
+		return self.i < len(self.types)
 
 	#####################################################################
 
 	def next(self):
-		result = self.tokens[self.i]
+		result = getText(self.s, self.starts[self.i], self.ends[self.i])
+
+		self.i += 1
+
+		return result
+
+	#####################################################################
+
+	def nextSpan(self):
+		result = (self.starts[self.i], self.ends[self.i])
 
 		self.i += 1
 
@@ -129,7 +385,7 @@ class Tokenizer(object):
 	#####################################################################
 
 	def peekToken(self):
-		return self.tokens[self.i]
+		return getText(self.s, self.starts[self.i], self.ends[self.i])
 
 	#####################################################################
 
@@ -141,34 +397,318 @@ class Tokenizer(object):
 	def peekLine(self):
 
 		if self.hasNext():
-			return self.lines[self.i - 0]
+			return self.getLine(self.i - 0)
+		elif self.i > 0:
+			return self.getLine(self.i - 1)
 		else:
-			return self.lines[self.i - 1]
+			return self.line
+
+	#####################################################################
+
+	def peekOffset(self):
+		return self.starts[self.i]
+
+	#####################################################################
+
+	def skip(self, i):
+		#############################################################
+		# Index of the bracket closing the container opened at `i`, #
+		# -1 if the tokens up to it do not follow the grammar: the  #
+		# tokens between two brackets are checked by `_SEGMENTS`.   #
+		# Strings being tokens, the brackets they contain are never #
+		# counted.						    #
+		#############################################################
+
+		if self.brackets is None:
+			self.brackets = self.types.tostring()
+
+		brackets = self.brackets
+
+		stack = []
+
+		previous = i
+		after_value = 0
+
+		for match in _BRACKETS.finditer(brackets, i):
+
+			j = match.start()
+
+			type = ord(match.group())
+
+			if type == Tokenizer.LBRACE or type == Tokenizer.LBRACKET:
+
+				if len(stack) > 0 and _SEGMENTS[stack[-1] == Tokenizer.RBRACE][after_value][0].match(brackets, previous + 1, j) is None:
+					return -1
+
+				stack.append(type + 1)
+
+				after_value = 0
+			else:
+
+				if len(stack) == 0 or stack[-1] != type or _SEGMENTS[type == Tokenizer.RBRACE][after_value][1].match(brackets, previous + 1, j) is None:
+					return -1
+
+				stack.pop()
+
+				if len(stack) == 0:
+					return j
+
+				after_value = 1
+
+			previous = j
+
+		return -1
 
 #############################################################################
 
 class Parser(object):
 	#####################################################################
 
-	def __init__(self, s, line = 1):
-		self.tokenizer = Tokenizer(s, line)
+	def __init__(self, s, line = 1, raw = False, lazy = False, lazy_lines = False, engine = 'regex', iterative = False, lazy_subtrees = False, keys = None, shared = None):
+		#############################################################
+		# `keys` (a dict) interns the member keys, pass the same    #
+		# dict to the parsers of a batch to share them between its  #
+		# documents. Without it, the keys are not interned	    #
+		#############################################################
+
+		self.keys = keys
+
+		#############################################################
+		# `shared` (a dict, see share()) enables the hash-consing   #
+		# of the values, it can be shared by a batch as well	    #
+		#############################################################
+
+		self.shared = shared
+
+		self.tokenizer = Tokenizer(s, line, raw = raw, lazy_lines = lazy_lines, engine = engine)
+
+		self.index = self.tokenizer.index
+
+		self.lazy = lazy
+		self.lazy_subtrees = lazy_subtrees
+
+		self.iterative = iterative
+
+		self.root = self.parseRoot()
+
+	#####################################################################
+
+	def parseRoot(self):
 
-		self.root = self.parseObject()
+		if self.iterative:
+			result = self.parseIterative()
+		else:
+			result = self.parseObject()
 
-		if self.root is None:
+		if result is None:
 			self.error('missing root object')
 
+		return result
+
+	#####################################################################
+	#   object ::= { members? }	(explicit stack, no recursion)
+	#####################################################################
+
+	def parseIterative(self):
+		#############################################################
+		# Builds the same tree as parseObject() with the state	    #
+		# table of `EventParser`: the nesting depth is only bounded #
+		# by the memory.					    #
+		#############################################################
+
+		tokenizer = self.tokenizer
+
+		s = tokenizer.s
+		types = tokenizer.types
+		starts = tokenizer.starts
+		ends = tokenizer.ends
+
+		index = self.index
+		lazy = self.lazy
+		lazy_subtrees = self.lazy_subtrees
+
+		keys = self.keys
+
+		shared = self.shared
+
+		if index is None:
+			positions = tokenizer.lines
+		else:
+			positions = starts
+
+		TABLE = EventParser.TABLE
+
+		#############################################################
+		# `stack` holds the enclosing containers as tuples:	    #
+		#   (L, is_object, line, key)				    #
+		# where `key` is the token index of the pending key.	    #
+		#############################################################
+
+		stack = []
+
+		L = None
+		is_object = True
+		line = 0
+		key = -1
+
+		state = EventParser.ROOT
+
+		result = None
+
+		i = tokenizer.i
+		n = len(types)
+
+		while i < n:
+
+			type = types[i]
+
+			action = TABLE[state].get(type)
+
+			if action is None:
+				tokenizer.i = i
+
+				self.error(EventParser.UNEXPECTED[state])
+
+			#####################################################
+			# CONTAINERS					    #
+			#####################################################
+
+			if action == EventParser.ACTION_OPEN_OBJECT or action == EventParser.ACTION_OPEN_ARRAY:
+
+				if lazy_subtrees and not L is None:
+					j = tokenizer.skip(i)
+				else:
+					j = -1
+
+				if j < 0:
+					stack.append((L, is_object, line, key))
+
+					line = positions[i]
+
+					if action == EventParser.ACTION_OPEN_OBJECT:
+						L = list([])
+						is_object = True
+						state = EventParser.OBJECT_KEY
+					else:
+						L = list([])
+						is_object = False
+						state = EventParser.ARRAY_VALUE
+
+					i += 1
+
+					continue
+
+				value = LazyContainer(self, i, line = positions[i], index = index)
+
+				i = j + 1
+
+			elif action == EventParser.ACTION_CLOSE:
+
+				if is_object:
+					value = Value(Value.TYPE_OBJECT, object = Object(L, line = line, index = index), line = line, index = index)
+				else:
+					value = Value(Value.TYPE_ARRAY, array = Array(L, line = line, index = index), line = line, index = index)
+
+				L, is_object, line, key = stack.pop()
+
+				i += 1
+
+				if len(stack) == 0:
+					result = value.object
+
+					state = EventParser.DONE
+
+					break
+
+			#####################################################
+			# PAIRS & SEPARATORS				    #
+			#####################################################
+
+			elif action == EventParser.ACTION_KEY:
+				key = i
+				state = EventParser.OBJECT_COLON
+
+				i += 1
+
+				continue
+
+			elif action == EventParser.ACTION_COLON:
+				state = EventParser.OBJECT_VALUE
+
+				i += 1
+
+				continue
+
+			elif action == EventParser.ACTION_COMMA:
+
+				if is_object:
+					state = EventParser.OBJECT_KEY
+				else:
+					state = EventParser.ARRAY_VALUE
+
+				i += 1
+
+				continue
+
+			#####################################################
+			# PRIMITIVES					    #
+			#####################################################
+
+			elif type == Value.TYPE_STR:
+				value = LazyValue(s, starts[i], ends[i], line = positions[i], index = index)
+
+				i += 1
+
+			elif type == Value.TYPE_FLT:
+				value = NumberValue(getText(s, starts[i], ends[i]), line = positions[i], index = index)
+
+				i += 1
+
+			else:
+				value = Value(type, value = getText(s, starts[i], ends[i]), line = positions[i], index = index)
+
+				i += 1
+
+			#####################################################
+			# ATTACHES THE VALUE TO ITS CONTAINER		    #
+			#####################################################
+
+			if not shared is None:
+				value = self.share(value)
+
+			if is_object:
+
+				if lazy:
+					L.append(LazyPair(value, s, starts[key], ends[key], line = positions[key], index = index, keys = keys))
+				else:
+					L.append(Pair(getText(s, starts[key], ends[key]), value, line = positions[key], index = index, keys = keys))
+
+				state = EventParser.OBJECT_NEXT
+			else:
+				L.append(value)
+
+				state = EventParser.ARRAY_NEXT
+
+		#############################################################
+
+		tokenizer.i = i
+
+		if state != EventParser.DONE:
+			self.error(EventParser.TRUNCATED[state])
+
+		return result
+
 	#####################################################################
 	#   object ::= { members? }
 	#####################################################################
 
 	def parseObject(self):
-		L = set([])
+		L = list([])
 
 		if not self.tokenizer.hasNext() or self.tokenizer.peekType() != Tokenizer.LBRACE:
 			return None
 
-		line = self.tokenizer.peekLine()
+		line = self.position()
 		self.tokenizer.next()
 
 		self.parseMembers(L)
@@ -178,7 +718,7 @@ class Parser(object):
 
 		self.tokenizer.next()
 
-		return Object(L, line = line)
+		return Object(L, line = line, index = self.index)
 
 	#####################################################################
 	#   members ::= pair (, members)?
@@ -192,7 +732,7 @@ class Parser(object):
 			if pair is None:
 				break
 
-			L.add(pair)
+			L.append(pair)
 
 			if not self.tokenizer.hasNext() or self.tokenizer.peekType() != Tokenizer.COMMA:
 				break
@@ -211,8 +751,13 @@ class Parser(object):
 		if not self.tokenizer.hasNext() or self.tokenizer.peekType() != Value.TYPE_STR:
 			return None
 
-		line = self.tokenizer.peekLine()
-		str = self.tokenizer.next()
+		line = self.position()
+
+		if self.lazy:
+			str = None
+			start, end = self.tokenizer.nextSpan()
+		else:
+			str = self.tokenizer.next()
 
 		#########
 		#   :   #
@@ -232,9 +777,15 @@ class Parser(object):
 		if value is None:
 			self.error('missing value')
 
+		if not self.shared is None:
+			value = self.share(value)
+
 		#########
 
-		return Pair(str, value, line = line)
+		if self.lazy:
+			return LazyPair(value, self.tokenizer.s, start, end, line = line, index = self.index, keys = self.keys)
+		else:
+			return Pair(str, value, line = line, index = self.index, keys = self.keys)
 
 	#####################################################################
 	#   array ::= [ elements? ]
@@ -246,7 +797,7 @@ class Parser(object):
 		if not self.tokenizer.hasNext() or self.tokenizer.peekType() != Tokenizer.LBRACKET:
 			return None
 
-		line = self.tokenizer.peekLine()
+		line = self.position()
 		self.tokenizer.next()
 
 		self.parseElements(L)
@@ -256,7 +807,7 @@ class Parser(object):
 
 		self.tokenizer.next()
 
-		return Array(L, line = line)
+		return Array(L, line = line, index = self.index)
 
 	#####################################################################
 	#   elements ::= value (, elements)?
@@ -270,6 +821,9 @@ class Parser(object):
 			if value is None:
 				break
 
+			if not self.shared is None:
+				value = self.share(value)
+
 			L.append(value)
 
 			if not self.tokenizer.hasNext() or self.tokenizer.peekType() != Tokenizer.COMMA:
@@ -286,7 +840,7 @@ class Parser(object):
 		if not self.tokenizer.hasNext():
 			self.error('truncated json data')
 
-		line = self.tokenizer.peekLine()
+		line = self.position()
 
 		##############
 		# PRIMITIVES #
@@ -294,26 +848,49 @@ class Parser(object):
 
 		type = self.tokenizer.peekType()
 
-		if type in [Value.TYPE_NULL, Value.TYPE_TRUE, Value.TYPE_FALSE, Value.TYPE_FLT, Value.TYPE_STR]:
-			return Value(type, value = self.tokenizer.next(), line = line)
+		if type == Value.TYPE_STR:
+			start, end = self.tokenizer.nextSpan()
+
+			return LazyValue(self.tokenizer.s, start, end, line = line, index = self.index)
+
+		if type == Value.TYPE_FLT:
+			return NumberValue(self.tokenizer.next(), line = line, index = self.index)
+
+		if type in [Value.TYPE_NULL, Value.TYPE_TRUE, Value.TYPE_FALSE]:
+			return Value(type, value = self.tokenizer.next(), line = line, index = self.index)
 
 		###########
-		# OBJECTS #
+		# SUBTREE #
 		###########
 
-		object = self.parseObject()
+		if self.lazy_subtrees and (type == Tokenizer.LBRACE or type == Tokenizer.LBRACKET):
 
-		if not object is None:
-			return Value(Value.TYPE_OBJECT, object = object, line = line)
+			i = self.tokenizer.i
 
-		##########
-		# ARRAYS #
-		##########
+			j = self.tokenizer.skip(i)
+
+			if j >= 0:
+				self.tokenizer.i = j + 1
+
+				return LazyContainer(self, i, line = line, index = self.index)
+
+		###########
+		# OBJECTS #
+		###########
+
+		object = self.parseObject()
+
+		if not object is None:
+			return Value(Value.TYPE_OBJECT, object = object, line = line, index = self.index)
+
+		##########
+		# ARRAYS #
+		##########
 
 		array = self.parseArray()
 
 		if not array is None:
-			return Value(Value.TYPE_ARRAY, array = array, line = line)
+			return Value(Value.TYPE_ARRAY, array = array, line = line, index = self.index)
 
 		########
 
@@ -321,6 +898,45 @@ class Parser(object):
 
 	#####################################################################
 
+	def share(self, value):
+		#############################################################
+		# Hash-consing: returns the first value seen with the same  #
+		# fingerprint. Children are shared before their parent, so  #
+		# containers are fingerprinted by the id() of their values, #
+		# and lazy keys and strings by their source text so that    #
+		# nothing gets decoded. Bracket-matched subtrees are not    #
+		# shared. A shared value is the node of its first	    #
+		# occurrence: it keeps its line (lazy lines resolve in the  #
+		# first document) and must not be modified in place	    #
+		#############################################################
+
+		type = value.type
+
+		if   isinstance(value, LazyContainer):
+			return value
+		elif type == Value.TYPE_OBJECT:
+			fingerprint = (type, tuple([(_fingerprint(pair), id(pair.value)) for pair in value._data.pairs]))
+		elif type == Value.TYPE_ARRAY:
+			fingerprint = (type, tuple([id(item) for item in value._data.values]))
+		else:
+			fingerprint = (type, _fingerprint(value))
+
+		return self.shared.setdefault(fingerprint, value)
+
+	#####################################################################
+
+	def position(self):
+		#############################################################
+		# Nodes record the token offset when lines are lazy	    #
+		#############################################################
+
+		if self.index is None:
+			return self.tokenizer.peekLine()
+		else:
+			return self.tokenizer.peekOffset()
+
+	#####################################################################
+
 	def error(self, s):
 
 		if sys.platform in ['win32', 'win64']:
@@ -344,25 +960,187 @@ class Parser(object):
 
 #############################################################################
 
-def parseString(s, line = 1):
-	return Parser(s, line = line)
+def _fingerprint(node):
+	#####################################################################
+	# Source text of a lazy key or string not decoded yet, in a tuple   #
+	# so that it cannot be mistaken for a decoded one		    #
+	#####################################################################
+
+	if   isinstance(node, LazyPair) and node._key is None:
+		return (node._source[node._start: node._end], )
+	elif isinstance(node, LazyValue) and not node._source is None:
+		return (node._source[node._data: node._end], )
+	elif isinstance(node, Pair):
+		return node._key
+	else:
+		return node._data
 
 #############################################################################
 
-class Object(object):
+def parseString(s, line = 1, lazy_lines = False, engine = 'regex', iterative = False, lazy_subtrees = False, keys = None, shared = None):
+	#####################################################################
+	# Byte strings are UTF-8: they are scanned without being decoded,   #
+	# and only the keys and strings that are read get decoded. With	    #
+	# engine `json`, see `accelerated.AcceleratedParser` (imported	    #
+	# here, as it derives from `Parser`). With `shared`, equal values   #
+	# are one node (see `Parser.share`) which has the line of the	    #
+	# first occurrence: only the lines of the pairs can be trusted,	    #
+	# and the errors of a validator about the later occurrences point   #
+	# at the first one.						    #
 	#####################################################################
 
-	def __init__(self, pairs, line = 1):
-		self.line = line
+	if engine == 'json':
+		import jsonv.accelerated
+
+		return jsonv.accelerated.AcceleratedParser(s, line = line, lazy_lines = lazy_lines, iterative = iterative, lazy_subtrees = lazy_subtrees, keys = keys, shared = shared)
+
+	if isinstance(s, str):
+		return Parser(s, line = line, raw = True, lazy = True, lazy_lines = lazy_lines, engine = engine, iterative = iterative, lazy_subtrees = lazy_subtrees, keys = keys, shared = shared)
+	else:
+		return Parser(s, line = line, raw = False, lazy = False, lazy_lines = lazy_lines, engine = engine, iterative = iterative, lazy_subtrees = lazy_subtrees, keys = keys, shared = shared)
+
+#############################################################################
+
+def parseDocuments(s, line = 1, lazy_lines = False, engine = 'regex', iterative = False, lazy_subtrees = False, keys = None, shared = None):
+	#####################################################################
+	# Concatenated or newline-delimited documents: see DocumentParser   #
+	#####################################################################
+
+	if isinstance(s, str):
+		return DocumentParser(s, line = line, raw = True, lazy = True, lazy_lines = lazy_lines, engine = engine, iterative = iterative, lazy_subtrees = lazy_subtrees, keys = keys, shared = shared)
+	else:
+		return DocumentParser(s, line = line, raw = False, lazy = False, lazy_lines = lazy_lines, engine = engine, iterative = iterative, lazy_subtrees = lazy_subtrees, keys = keys, shared = shared)
+
+#############################################################################
+
+def parseFile(path, line = 1, lazy_lines = False, engine = 'regex', iterative = False, lazy_subtrees = False, keys = None, shared = None):
+	#####################################################################
+	# The document is mapped, not read: tokens are offsets into the map #
+	# and keys/strings are only decoded when they are accessed.	    #
+	#####################################################################
+
+	f = open(path, 'rb')
+
+	try:
+		try:
+			s = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+
+		except ValueError:
+			s = ''
+
+	finally:
+		f.close()
+
+	return Parser(s, line = line, raw = True, lazy = True, lazy_lines = lazy_lines, engine = engine, iterative = iterative, lazy_subtrees = lazy_subtrees, keys = keys, shared = shared)
+
+#############################################################################
+
+class DocumentParser(Parser):
+	#####################################################################
+	# Iterator over a stream of root objects written back to back (as   #
+	# in NDJSON): the input is scanned once and each next() parses one  #
+	# more document from the same tokens, so lines are absolute.	    #
+	#####################################################################
+
+	def parseRoot(self):
+		return None
+
+	#####################################################################
+
+	def __iter__(self):
+		return self
+
+	#####################################################################
+
+	def next(self):
+
+		if not self.tokenizer.hasNext():
+			raise StopIteration
+
+		self.root = Parser.parseRoot(self)
+
+		return self.root
+
+#############################################################################
+
+class Node(object):
+	#####################################################################
+
+	__slots__ = ('_line', '_index')
+
+	#####################################################################
+
+	def __init__(self, line = 1, index = None):
+		self._line = line
+		self._index = index
+
+	#####################################################################
+
+	def _getLine(self):
+
+		if self._index is None:
+			return self._line
+		else:
+			return self._index.resolve(self._line)
+
+	#####################################################################
+
+	def _setLine(self, line):
+		self._line = line
+		self._index = None
+
+	#####################################################################
+
+	line = property(_getLine, _setLine)
+
+#############################################################################
+
+class Object(Node):
+	#####################################################################
+	# `pairs` is the list of the members in document order, `_keys`	    #
+	# maps each key to its (last) pair and is built on the first	    #
+	# lookup, then rebuilt whenever members are added or removed.	    #
+	#####################################################################
+
+	__slots__ = ('pairs', '_keys', '_size')
+
+	#####################################################################
+
+	def __init__(self, pairs, line = 1, index = None):
+		Node.__init__(self, line, index)
+
 		self.pairs = pairs
 
+		self._keys = None
+		self._size = 0
+
+	#####################################################################
+
+	def getPair(self, key):
+
+		if self._keys is None or self._size != len(self.pairs):
+			self._keys = dict((pair.key, pair) for pair in self.pairs)
+			self._size = len(self.pairs)
+
+		return self._keys.get(key)
+
+	#####################################################################
+
+	def getValue(self, key):
+		pair = self.getPair(key)
+
+		if pair is None:
+			return None
+		else:
+			return pair.value
+
 	#####################################################################
 
 	def to_python(self):
 		result = {}
 
 		for pair in self.pairs:
-			result.update(pair.to_python())
+			result[pair.key] = pair.value.to_python()
 
 		return result
 
@@ -377,11 +1155,16 @@ class Object(object):
 
 #############################################################################
 
-class Array(object):
+class Array(Node):
 	#####################################################################
 
-	def __init__(self, values, line = 1):
-		self.line = line
+	__slots__ = ('values', )
+
+	#####################################################################
+
+	def __init__(self, values, line = 1, index = None):
+		Node.__init__(self, line, index)
+
 		self.values = values
 
 	#####################################################################
@@ -405,23 +1188,38 @@ class Array(object):
 
 #############################################################################
 
-class Pair(object):
+class Pair(Node):
 	#####################################################################
 
-	def __init__(self, key, value, line = 1):
-		self.line = line
+	__slots__ = ('_key', 'value')
 
-		if key[0] == '\'' or key[0] == '\"':
-			key = key[+1: ]
-			key = key[: -1]
+	#####################################################################
 
-		self. key  =  key
+	def __init__(self, key, value, line = 1, index = None, keys = None):
+		Node.__init__(self, line, index)
+
+		if not key is None:
+			key = unquote(key)
+
+			if not keys is None:
+				key = keys.setdefault(key, key)
+
+		self._key = key
 		self.value = value
 
 	#####################################################################
 
-	def __hash__(self):
-		return self.key.__hash__()
+	def _getKey(self):
+		return self._key
+
+	#####################################################################
+
+	def _setKey(self, key):
+		self._key = key
+
+	#####################################################################
+
+	key = property(_getKey, _setKey)
 
 	#####################################################################
 
@@ -431,7 +1229,7 @@ class Pair(object):
 	#####################################################################
 
 	def to_string(self):
-		return '"%s":%s' % (self.key, self.value)
+		return '"%s":%s' % (escape(self.key), self.value)
 
 	#####################################################################
 
@@ -439,7 +1237,45 @@ class Pair(object):
 
 #############################################################################
 
-class Value(object):
+class LazyPair(Pair):
+	#####################################################################
+	# Pair whose key is a span of the source, decoded on first access   #
+	#####################################################################
+
+	__slots__ = ('_source', '_start', '_end', '_table')
+
+	#####################################################################
+
+	def __init__(self, value, source, start, end, line = 1, index = None, keys = None):
+		Pair.__init__(self, None, value, line, index)
+
+		self._source = source
+		self._start = start
+		self._end = end
+
+		self._table = keys
+
+	#####################################################################
+
+	def _getKey(self):
+
+		if self._key is None:
+			key = unescape(getText(self._source, self._start + 1, self._end - 1))
+
+			if not self._table is None:
+				key = self._table.setdefault(key, key)
+
+			self._key = key
+
+		return self._key
+
+	#####################################################################
+
+	key = property(_getKey, Pair._setKey)
+
+#############################################################################
+
+class Value(Node):
 	#####################################################################
 
 	TYPE_OBJECT = 100
@@ -450,31 +1286,76 @@ class Value(object):
 	TYPE_FALSE = 105
 	TYPE_NULL = 106
 
+	#####################################################################
+	# `_data` is the single payload: the Object for TYPE_OBJECT, the    #
+	# Array for TYPE_ARRAY and the text of the value otherwise.	    #
 	#####################################################################
 
-	def __init__(self, type, object = None, array = None, value = None, line = 1):
-		self.line = line
+	__slots__ = ('type', '_data')
+
+	#####################################################################
+
+	def __init__(self, type, object = None, array = None, value = None, line = 1, index = None):
+		Node.__init__(self, line, index)
+
 		self.type = type
-		self.object = object
-		self.array = array
 
-		if self.type == self.TYPE_STR and (value[0] == '\'' or value[0] == '\"'):
-			value = value[+1: ]
-			value = value[: -1]
+		if   type == Value.TYPE_OBJECT:
+			self._data = object
+		elif type == Value.TYPE_ARRAY:
+			self._data = array
+		elif type == Value.TYPE_STR and not value is None:
+			self._data = unquote(value)
+		else:
+			self._data = value
 
-			value = value.replace('\\\'', '\'')
-			value = value.replace('\\\"', '\"')
+	#####################################################################
 
-			value = value.replace('\\\\', '\\')
-			value = value.replace('\\/', '/')
+	def _getObject(self):
 
-			value = value.replace('\\b', '\b')
-			value = value.replace('\\f', '\f')
-			value = value.replace('\\n', '\n')
-			value = value.replace('\\r', '\r')
-			value = value.replace('\\t', '\t')
+		if self.type == Value.TYPE_OBJECT:
+			return self._data
+		else:
+			return None
 
-		self.value = value
+	#####################################################################
+
+	def _getArray(self):
+
+		if self.type == Value.TYPE_ARRAY:
+			return self._data
+		else:
+			return None
+
+	#####################################################################
+
+	def _getValue(self):
+
+		if self.type == Value.TYPE_OBJECT or self.type == Value.TYPE_ARRAY:
+			return None
+		else:
+			return self._data
+
+	#####################################################################
+
+	def _setValue(self, value):
+		self._data = value
+
+	#####################################################################
+
+	def _getNumber(self):
+
+		if self.type == Value.TYPE_FLT:
+			return toNumber(self._data)
+		else:
+			return None
+
+	#####################################################################
+
+	object = property(_getObject)
+	array = property(_getArray)
+	value = property(_getValue, _setValue)
+	number = property(_getNumber)
 
 	#####################################################################
 
@@ -502,17 +1383,11 @@ class Value(object):
 	def to_python(self):
 
 		if   self.type == Value.TYPE_OBJECT:
-			result = self.object.to_python()
+			result = self._data.to_python()
 		elif self.type == Value.TYPE_ARRAY:
-			result = self.array.to_python()
+			result = self._data.to_python()
 		elif self.type == Value.TYPE_FLT:
-
-			try:
-				result = int(self.value)
-
-			except ValueError:
-				result = float(self.value)
-
+			result = self.number
 		elif self.type == Value.TYPE_STR:
 			result = self.value
 		elif self.type == Value.TYPE_TRUE:
@@ -528,16 +1403,400 @@ class Value(object):
 
 	def to_string(self):
 		if   self.type == self.TYPE_OBJECT:
-			return self.object.to_string()
+			return self._data.to_string()
 		elif self.type == self.TYPE_ARRAY:
-			return self.array.to_string()
+			return self._data.to_string()
 		elif self.type == self.TYPE_STR:
-			return '"%s"' % self.value
+			return '"%s"' % escape(self.value)
+		else:
+			return self._data
+
+	#####################################################################
+
+	__str__ = to_string
+
+#############################################################################
+
+class NumberValue(Value):
+	#####################################################################
+	# Number value whose int or float is converted once, on first use   #
+	#####################################################################
+
+	__slots__ = ('_number', )
+
+	#####################################################################
+
+	def __init__(self, value, line = 1, index = None):
+		Value.__init__(self, Value.TYPE_FLT, value = value, line = line, index = index)
+
+		self._number = None
+
+	#####################################################################
+
+	def _getNumber(self):
+
+		if self._number is None:
+			self._number = toNumber(self._data)
+
+		return self._number
+
+	#####################################################################
+
+	def _setValue(self, value):
+		self._data = value
+
+		self._number = None
+
+	#####################################################################
+
+	value = property(Value._getValue, _setValue)
+	number = property(_getNumber)
+
+#############################################################################
+
+class LazyValue(Value):
+	#####################################################################
+	# String value which is a span of the source, decoded on first read #
+	#####################################################################
+
+	__slots__ = ('_source', '_end')
+
+	#####################################################################
+
+	def __init__(self, source, start, end, line = 1, index = None):
+		Value.__init__(self, Value.TYPE_STR, line = line, index = index)
+
+		self._data = start
+
+		self._source = source
+		self._end = end
+
+	#####################################################################
+
+	def _getValue(self):
+
+		if not self._source is None:
+			self._data = unescape(getText(self._source, self._data + 1, self._end - 1))
+
+			self._source = None
+
+		return self._data
+
+	#####################################################################
+
+	def _setValue(self, value):
+		self._data = value
+
+		self._source = None
+
+	#####################################################################
+
+	value = property(_getValue, _setValue)
+
+#############################################################################
+
+class LazyContainer(Value):
+	#####################################################################
+	# Object or array value whose tokens were only checked (see	    #
+	# Tokenizer.skip): it is parsed, one level deep, the first time it  #
+	# is accessed.							    #
+	#####################################################################
+
+	__slots__ = ('_parser', '_first')
+
+	#####################################################################
+
+	def __init__(self, parser, first, line = 1, index = None):
+
+		if parser.tokenizer.types[first] == Tokenizer.LBRACE:
+			Value.__init__(self, Value.TYPE_OBJECT, line = line, index = index)
 		else:
-			return self.value
+			Value.__init__(self, Value.TYPE_ARRAY, line = line, index = index)
+
+		self._parser = parser
+		self._first = first
+
+	#####################################################################
+
+	def _load(self):
+
+		if not self._parser is None:
+
+			tokenizer = self._parser.tokenizer
+
+			i = tokenizer.i
+
+			tokenizer.i = self._first
+
+			try:
+				if self.type == Value.TYPE_OBJECT:
+					self._data = self._parser.parseObject()
+				else:
+					self._data = self._parser.parseArray()
+
+			finally:
+				tokenizer.i = i
+
+			self._parser = None
+
+		return self._data
+
+	#####################################################################
+
+	def _getObject(self):
+
+		if self.type == Value.TYPE_OBJECT:
+			return self._load()
+		else:
+			return None
+
+	#####################################################################
+
+	def _getArray(self):
+
+		if self.type == Value.TYPE_ARRAY:
+			return self._load()
+		else:
+			return None
+
+	#####################################################################
+
+	object = property(_getObject)
+	array = property(_getArray)
+
+	#####################################################################
+
+	def to_python(self):
+		return self._load().to_python()
+
+	#####################################################################
+
+	def to_string(self):
+		return self._load().to_string()
 
 	#####################################################################
 
 	__str__ = to_string
 
 #############################################################################
+
+class EventParser(object):
+	#####################################################################
+	# Token driven state machine of the grammar: push() consumes one    #
+	# token and returns at most one event:				    #
+	#   ('start_object', line)	('end_object', line)		    #
+	#   ('start_array', line)	('end_array', line)		    #
+	#   ('key', text, line)		('scalar', type, text, line)	    #
+	# where `text` is the raw token (see `unquote`).		    #
+	#####################################################################
+
+	ROOT = 0
+	OBJECT_KEY = 1
+	OBJECT_COLON = 2
+	OBJECT_VALUE = 3
+	OBJECT_NEXT = 4
+	ARRAY_VALUE = 5
+	ARRAY_NEXT = 6
+	DONE = 7
+
+	#####################################################################
+
+	PRIMITIVES = set([Value.TYPE_NULL, Value.TYPE_TRUE, Value.TYPE_FALSE, Value.TYPE_FLT, Value.TYPE_STR])
+
+	#####################################################################
+	# State table of the grammar (used by `Parser.parseIterative`):	    #
+	# TABLE[state] maps the accepted token types to an action, other    #
+	# tokens are reported with UNEXPECTED[state] and the end of the	    #
+	# input with TRUNCATED[state].					    #
+	#####################################################################
+
+	ACTION_OPEN_OBJECT = 0
+	ACTION_OPEN_ARRAY = 1
+	ACTION_CLOSE = 2
+	ACTION_KEY = 3
+	ACTION_COLON = 4
+	ACTION_SCALAR = 5
+	ACTION_COMMA = 6
+
+	_VALUE = dict([(type, ACTION_SCALAR) for type in PRIMITIVES] + [(Tokenizer.LBRACE, ACTION_OPEN_OBJECT), (Tokenizer.LBRACKET, ACTION_OPEN_ARRAY)])
+
+	TABLE = [
+		{Tokenizer.LBRACE: ACTION_OPEN_OBJECT},
+		{Value.TYPE_STR: ACTION_KEY, Tokenizer.RBRACE: ACTION_CLOSE},
+		{Tokenizer.COLON: ACTION_COLON},
+		dict(_VALUE),
+		{Tokenizer.COMMA: ACTION_COMMA, Tokenizer.RBRACE: ACTION_CLOSE},
+		dict(_VALUE.items() + [(Tokenizer.RBRACKET, ACTION_CLOSE)]),
+		{Tokenizer.COMMA: ACTION_COMMA, Tokenizer.RBRACKET: ACTION_CLOSE},
+	]
+
+	UNEXPECTED = ['missing root object', 'missing `}`', 'missing `:`', 'missing value', 'missing `}`', 'missing `]`', 'missing `]`']
+	TRUNCATED = ['missing root object', 'missing `}`', 'missing `:`', 'truncated json data', 'missing `}`', 'truncated json data', 'missing `]`']
+
+	#####################################################################
+
+	def __init__(self, line = 1):
+		self.stack = []
+		self.state = EventParser.ROOT
+
+		self.line = line
+
+	#####################################################################
+
+	def push(self, type, token, line):
+
+		self.line = line
+
+		state = self.state
+
+		#############################################################
+		#   object ::= { members? }				    #
+		#############################################################
+
+		if   state == EventParser.ROOT:
+
+			if type != Tokenizer.LBRACE:
+				self.error('missing root object')
+
+			return self._open(True, line)
+
+		#############################################################
+		#   pair ::= str : value				    #
+		#############################################################
+
+		elif state == EventParser.OBJECT_KEY:
+
+			if   type == Value.TYPE_STR:
+				self.state = EventParser.OBJECT_COLON
+
+				return ('key', token, line)
+
+			elif type == Tokenizer.RBRACE:
+				return self._close(line)
+
+			else:
+				self.error('missing `}`')
+
+		elif state == EventParser.OBJECT_COLON:
+
+			if type != Tokenizer.COLON:
+				self.error('missing `:`')
+
+			self.state = EventParser.OBJECT_VALUE
+
+		#############################################################
+		#   value ::= object | array | null | true | false | ...    #
+		#############################################################
+
+		elif state == EventParser.OBJECT_VALUE or state == EventParser.ARRAY_VALUE:
+
+			if   type in EventParser.PRIMITIVES:
+				self._next()
+
+				return ('scalar', type, token, line)
+
+			elif type == Tokenizer.LBRACE:
+				return self._open(True, line)
+
+			elif type == Tokenizer.LBRACKET:
+				return self._open(False, line)
+
+			elif type == Tokenizer.RBRACKET and state == EventParser.ARRAY_VALUE:
+				return self._close(line)
+
+			elif state == EventParser.OBJECT_VALUE:
+				self.error('missing value')
+
+			else:
+				self.error('missing `]`')
+
+		#############################################################
+		#   members ::= pair (, members)?			    #
+		#############################################################
+
+		elif state == EventParser.OBJECT_NEXT:
+
+			if   type == Tokenizer.COMMA:
+				self.state = EventParser.OBJECT_KEY
+			elif type == Tokenizer.RBRACE:
+				return self._close(line)
+			else:
+				self.error('missing `}`')
+
+		#############################################################
+		#   elements ::= value (, elements)?			    #
+		#############################################################
+
+		elif state == EventParser.ARRAY_NEXT:
+
+			if   type == Tokenizer.COMMA:
+				self.state = EventParser.ARRAY_VALUE
+			elif type == Tokenizer.RBRACKET:
+				return self._close(line)
+			else:
+				self.error('missing `]`')
+
+		return None
+
+	#####################################################################
+
+	def finish(self):
+		#############################################################
+		# SAME DIAGNOSTICS AS THE RECURSIVE PARSER		    #
+		#############################################################
+
+		if self.state != EventParser.DONE:
+			self.error(EventParser.TRUNCATED[self.state])
+
+	#####################################################################
+
+	def done(self):
+		return self.state == EventParser.DONE
+
+	#####################################################################
+
+	def _open(self, is_object, line):
+		self.stack.append(is_object)
+
+		if is_object:
+			self.state = EventParser.OBJECT_KEY
+
+			return ('start_object', line)
+		else:
+			self.state = EventParser.ARRAY_VALUE
+
+			return ('start_array', line)
+
+	#####################################################################
+
+	def _close(self, line):
+		is_object = self.stack.pop()
+
+		self._next()
+
+		if is_object:
+			return ('end_object', line)
+		else:
+			return ('end_array', line)
+
+	#####################################################################
+
+	def _next(self):
+
+		if len(self.stack) == 0:
+			self.state = EventParser.DONE
+		elif self.stack[-1]:
+			self.state = EventParser.OBJECT_NEXT
+		else:
+			self.state = EventParser.ARRAY_NEXT
+
+	#####################################################################
+
+	def error(self, s):
+
+		if sys.platform in ['win32', 'win64']:
+			raise JsonParserError('syntax error, line `%d`, %s' % (self.line, s))
+		else:
+			raise JsonParserError('syntax error, line `%d`, \033[31m%s\033[0m' % (self.line, s))
+
+#############################################################################
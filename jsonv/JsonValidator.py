@@ -7,7 +7,11 @@
 #
 #############################################################################
 
-import os, jsonv.JsonParser, jsonv.ExprParser
+import os, sys, glob, json, hashlib, tempfile, jsonv.nfa, jsonv.JsonParser, jsonv.ExprParser
+
+#############################################################################
+
+CACHE_VERSION = 3
 
 #############################################################################
 
@@ -19,12 +23,16 @@ class JsonValidatorError(Exception):
 class Validator(jsonv.JsonParser.Parser):
 	#####################################################################
 
-	def __init__(self, s, verbose = False):
-		#############################################################
-		# CONSTRUCTOR						    #
-		#############################################################
+	OBJECT_TYPES = frozenset(['object'])
+	ARRAY_TYPES = frozenset(['array'])
+	VALUE_TYPES = frozenset(['bool', 'flt', 'str'])
+
+	REORDER_LIMIT = 10000
+
+	#####################################################################
 
-		jsonv.JsonParser.Parser.__init__(self, s)
+	def __init__(self, s, verbose = False, minimize = True, construction = 'thompson'):
+		jsonv.JsonParser.Parser.__init__(self, s, keys = {})
 
 		self.verbose = verbose
 
@@ -103,7 +111,7 @@ class Validator(jsonv.JsonParser.Parser):
 						raise JsonValidatorError('error: line `%d`: invalid value type for pair `key`' % pair2.line)
 					if not json_key is None:
 						print('warning: line `%d`: redefined pair `key`' % pair2.line)
-					json_key = pair2.value.value
+					json_key = self.keys.setdefault(pair2.value.value, pair2.value.value)
 
 				#############################################
 				# TYPE					    #
@@ -193,6 +201,14 @@ class Validator(jsonv.JsonParser.Parser):
 		if self.entry is None:
 			raise JsonValidatorError('error: line `%d`: no entry point' % pair1.line)
 
+		#############################################################
+		# NUMBER RULES						    #
+		#############################################################
+
+		self.SYMBOLS = [self.RULES[rule_name] for rule_name in sorted(self.RULES)]
+
+		self.SYMBOL_IDS = dict((self.SYMBOLS[i].name, i) for i in xrange(len(self.SYMBOLS)))
+
 		#############################################################
 		# COMPILE RULES						    #
 		#############################################################
@@ -201,13 +217,13 @@ class Validator(jsonv.JsonParser.Parser):
 
 			if not self.RULES[rule_name].expr is None:
 
-				self.RULES[rule_name].compile(self.RULE_KEYS, verbose = self.verbose)
+				self.RULES[rule_name].compile(self.RULE_KEYS, verbose = self.verbose, minimize = minimize, symbols = self.SYMBOL_IDS, construction = construction)
 
 		#############################################################
 		# COMPILE ENTRY POINT					    #
 		#############################################################
 
-		self.entry.compile(self.RULE_KEYS, verbose = self.verbose)
+		self.entry.compile(self.RULE_KEYS, verbose = self.verbose, minimize = minimize, symbols = self.SYMBOL_IDS, construction = construction)
 
 		#############################################################
 		# VERBOSE MODE						    #
@@ -219,6 +235,7 @@ class Validator(jsonv.JsonParser.Parser):
 			print('#############################################################################')
 
 			print('entry: %s' % self.entry.EXPR.__str__())
+			print('   states: %d -> %d' % self.entry.EXPR.states)
 
 			for rule_name in self.RULES:
 				self.RULES[rule_name].dump()
@@ -227,11 +244,210 @@ class Validator(jsonv.JsonParser.Parser):
 
 	#####################################################################
 
-	def _validate_pair(self, closure, pair, verbose):
-		expected = ','.join(closure)
+	def _expected(self, closure):
+		result = ','.join(self.SYMBOLS[symbol].name for symbol, column in closure)
+
+		if len(result) == 0:
+			result = 'null'
+
+		return result
+
+	#####################################################################
+
+	def _match(self, closure, pair):
+		#############################################################
+		# The (symbol, column) of `closure` that _validate_pair()   #
+		# selects for `pair`, None if there is none		    #
+		#############################################################
+
+		key = pair.key
+
+		if   pair.value.type == jsonv.JsonParser.Value.TYPE_OBJECT:
+			json_types = Validator.OBJECT_TYPES
+		elif pair.value.type == jsonv.JsonParser.Value.TYPE_ARRAY:
+			json_types = Validator.ARRAY_TYPES
+		else:
+			json_types = Validator.VALUE_TYPES
+
+		for symbol, column in closure:
+
+			RULE = self.SYMBOLS[symbol]
+
+			if RULE.json_key == key and RULE.json_type in json_types:
+				return (symbol, column)
+
+		return None
+
+	#####################################################################
+
+	def _validate_members(self, dfa, pairs, verbose):
+		#############################################################
+		# Object members are unordered: they are read in document   #
+		# order first and, if `dfa` rejects this order, the other   #
+		# orders are searched (see _reorder()). Returns the state   #
+		# reached.						    #
+		#############################################################
+
+		state = dfa.start
+
+		i = 0
+		n = len(pairs)
+
+		while i < n:
+			match = self._match(dfa.closures[state], pairs[i])
+
+			if match is None:
+				break
+
+			self._validate_pair((match, ), pairs[i], verbose)
+
+			state = dfa.transitions[state * dfa.width + match[1]]
+
+			i += 1
+
+		if i == n and dfa.isFinalState(state):
+			return state
+
+		#############################################################
+		# OTHER ORDERS (the members read so far are not validated   #
+		# again)						    #
+		#############################################################
+
+		validated = set()
+
+		STATE = dfa.start
+
+		for j in xrange(i):
+			symbol, column = self._match(dfa.closures[STATE], pairs[j])
+
+			validated.add((j, symbol))
+
+			STATE = dfa.transitions[STATE * dfa.width + column]
+
+		result = self._reorder(dfa, pairs, validated, verbose)
+
+		if not result is None:
+			return result
+
+		if i < n:
+			self._validate_pair(dfa.closures[state], pairs[i], verbose)
+
+		return state
+
+	#####################################################################
+
+	def _reorder(self, dfa, pairs, validated, verbose):
+		#############################################################
+		# Search of an order of `pairs` that leads to a final	    #
+		# state. Members moving `dfa` alike from every state are    #
+		# interchangeable: they form a class read in document	    #
+		# order, so that a search state is (state, number of	    #
+		# members read in each class). A search state is given up   #
+		# as soon as a class left cannot be read any more	    #
+		# (`DenseDfa.futures`) or a symbol needed to reach a final  #
+		# state is matched by no class left (`DenseDfa.needs`).	    #
+		# The object is invalid if more than `REORDER_LIMIT` search #
+		# states are visited.					    #
+		#############################################################
+
+		classes = []
+		symbols = []
+
+		ids = {}
+
+		for i in xrange(len(pairs)):
+			matches = [self._match(closure, pairs[i]) for closure in dfa.closures]
+
+			signature = tuple([dfa.transitions[state * dfa.width + matches[state][1]] if not matches[state] is None else -1 for state in xrange(dfa.size)])
+
+			if not signature in ids:
+				ids[signature] = len(classes)
+
+				classes.append([])
+				symbols.append(set())
 
-		if len(expected) == 0:
-			expected = 'null'
+			classes[ids[signature]].append(i)
+			symbols[ids[signature]].update([match[0] for match in matches if not match is None])
+
+		#############################################################
+		# `todo` holds (state, taken) where `taken[c]` is the	    #
+		# number of members of class `c` already read		    #
+		#############################################################
+
+		full = tuple([len(members) for members in classes])
+
+		done = set()
+
+		todo = [(dfa.start, (0, ) * len(classes))]
+
+		while len(todo) > 0:
+			state, taken = todo.pop()
+
+			if taken == full:
+
+				if dfa.isFinalState(state):
+					return state
+
+				continue
+
+			if (state, taken) in done:
+				continue
+
+			if len(done) >= Validator.REORDER_LIMIT:
+				raise JsonValidatorError('error: line `%d`: too many orders of the members to search' % pairs[0].line)
+
+			done.add((state, taken))
+
+			#####################################################
+			# classes left that cannot be read any more	    #
+			#####################################################
+
+			left = [c for c in xrange(len(classes)) if taken[c] < full[c]]
+
+			if len([c for c in left if symbols[c].isdisjoint(dfa.futures[state])]) > 0:
+				continue
+
+			#####################################################
+			# symbols needed that no class left matches	    #
+			#####################################################
+
+			if dfa.needs[state] is None:
+				continue
+
+			if len([symbol for symbol in dfa.needs[state] if len([c for c in left if symbol in symbols[c]]) == 0]) > 0:
+				continue
+
+			#####################################################
+			# next member of each class			    #
+			#####################################################
+
+			for c in reversed(left):
+				i = classes[c][taken[c]]
+
+				match = self._match(dfa.closures[state], pairs[i])
+
+				if match is None:
+					continue
+
+				symbol, column = match
+
+				if not (i, symbol) in validated:
+					self._validate_pair((match, ), pairs[i], verbose)
+
+					validated.add((i, symbol))
+
+				todo.append((dfa.transitions[state * dfa.width + column], taken[: c] + (taken[c] + 1, ) + taken[c + 1: ]))
+
+		return None
+
+	#####################################################################
+
+	def _validate_pair(self, closure, pair, verbose):
+		#############################################################
+		# Returns the column of the matching rule in `closure`, the #
+		# (symbol, column) pairs leaving the current `DenseDfa`	    #
+		# state							    #
+		#############################################################
 
 		#############################################################
 		# OBJECT						    #
@@ -244,43 +460,33 @@ class Validator(jsonv.JsonParser.Parser):
 
 			rule = None
 
-			for rule_name in closure:
+			for symbol, column in closure:
 
-				RULE = self.RULES[rule_name]
+				RULE = self.SYMBOLS[symbol]
 
 				if RULE.json_type == 'object' and RULE.json_key == pair.key:
 					rule = RULE
 					break
 
 			if rule is None:
-				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for pair `%s`' % (pair.line, expected, pair.key))
+				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for pair `%s`' % (pair.line, self._expected(closure), pair.key))
 
 			#####################################################
-			# GET DFA & INITIAL STATE			    #
+			# GET DFA					    #
 			#####################################################
 
-			dfa = rule.EXPR.table
-
-			state = dfa.start
+			dfa = rule.EXPR.dense
 
 			#####################################################
 			# VALIDATE					    #
 			#####################################################
 
-			for sub_pair in pair.value.object.pairs:
-				transitions = dfa.transitions.get(state, dict())
-
-				states = transitions.get(self._validate_pair(transitions.keys(), sub_pair, verbose), None)
-
-				if states is None:
-					raise JsonValidatorError('error: line `%d`: unexpected pair `%s` in pair `%s` for rule `%s`' % (sub_pair.line, sub_pair.key, pair.key, rule.name))
-
-				state = iter(states).next()
+			state = self._validate_members(dfa, pair.value.object.pairs, verbose)
 
 			if not dfa.isFinalState(state):
 				raise JsonValidatorError('error: line `%d`: unexpected end in pair `%s` for rule `%s`' % (pair.line, pair.key, rule.name))
 
-			return rule.name
+			return column
 
 		#############################################################
 		# ARRAY							    #
@@ -293,22 +499,22 @@ class Validator(jsonv.JsonParser.Parser):
 
 			rule = None
 
-			for rule_name in closure:
+			for symbol, column in closure:
 
-				RULE = self.RULES[rule_name]
+				RULE = self.SYMBOLS[symbol]
 
 				if RULE.json_type == 'array' and RULE.json_key == pair.key:
 					rule = RULE
 					break
 
 			if rule is None:
-				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for pair `%s`' % (pair.line, expected, pair.key))
+				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for pair `%s`' % (pair.line, self._expected(closure), pair.key))
 
 			#####################################################
 			# GET DFA & INITIAL STATE			    #
 			#####################################################
 
-			dfa = rule.EXPR.table
+			dfa = rule.EXPR.dense
 
 			state = dfa.start
 
@@ -317,19 +523,15 @@ class Validator(jsonv.JsonParser.Parser):
 			#####################################################
 
 			for sub_value in pair.value.array.values:
-				transitions = dfa.transitions.get(state, dict())
+				state = dfa.transitions[state * dfa.width + self._validate_value(dfa.closures[state], sub_value, pair.key, verbose)]
 
-				states = transitions.get(self._validate_value(transitions.keys(), sub_value, pair.key, verbose), None)
-
-				if states is None:
+				if state < 0:
 					raise JsonValidatorError('error: line `%d`: unexpected value `%s` in pair `%s` for rule `%s`' % (sub_value.line, sub_value.getTypeString(), pair.key, rule.name))
 
-				state = iter(states).next()
-
 			if not dfa.isFinalState(state):
 				raise JsonValidatorError('error: line `%d`: unexpected end in value `%s` for rule `%s`' % (pair.line, pair.key, rule.name))
 
-			return rule.name
+			return column
 
 		#############################################################
 		# VALUE							    #
@@ -342,16 +544,16 @@ class Validator(jsonv.JsonParser.Parser):
 
 			rule = None
 
-			for rule_name in closure:
+			for symbol, column in closure:
 
-				RULE = self.RULES[rule_name]
+				RULE = self.SYMBOLS[symbol]
 
 				if RULE.json_type in ['bool', 'flt', 'str'] and RULE.json_key == pair.key:
 					rule = RULE
 					break
 
 			if rule is None:
-				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for pair `%s`' % (pair.line, expected, pair.key))
+				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for pair `%s`' % (pair.line, self._expected(closure), pair.key))
 
 			#####################################################
 			# VALIDATE					    #
@@ -361,7 +563,7 @@ class Validator(jsonv.JsonParser.Parser):
 			JSON_TYPE = pair.value.getTypeString()
 
 			if JSON_TYPE == 'null' or json_type == JSON_TYPE:
-				return rule.name
+				return column
 
 			else:
 				raise JsonValidatorError('error: line `%d`: type `%s` expected but type `%s` found in pair `%s` for rule `%s`' % (pair.line, json_type, JSON_TYPE, pair.key, rule.name))
@@ -369,11 +571,6 @@ class Validator(jsonv.JsonParser.Parser):
 	#####################################################################
 
 	def _validate_value(self, closure, value, last_pair_name, verbose):
-		expected = ','.join(closure)
-
-		if len(expected) == 0:
-			expected = 'null'
-
 		#############################################################
 		# OBJECT						    #
 		#############################################################
@@ -385,43 +582,33 @@ class Validator(jsonv.JsonParser.Parser):
 
 			rule = None
 
-			for rule_name in closure:
+			for symbol, column in closure:
 
-				RULE = self.RULES[rule_name]
+				RULE = self.SYMBOLS[symbol]
 
 				if RULE.json_type == 'object':
 					rule = RULE
 					break
 
 			if rule is None:
-				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for value of type `%s` from pair `%s`' % (value.line, expected, value.getTypeString(), last_pair_name))
+				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for value of type `%s` from pair `%s`' % (value.line, self._expected(closure), value.getTypeString(), last_pair_name))
 
 			#####################################################
-			# GET DFA & INITIAL STATE			    #
+			# GET DFA					    #
 			#####################################################
 
-			dfa = rule.EXPR.table
-
-			state = dfa.start
+			dfa = rule.EXPR.dense
 
 			#####################################################
 			# VALIDATE					    #
 			#####################################################
 
-			for sub_pair in value.object.pairs:
-				transitions = dfa.transitions.get(state, dict())
-
-				states = transitions.get(self._validate_pair(transitions.keys(), sub_pair, verbose), None)
-
-				if states is None:
-					raise JsonValidatorError('error: line `%d`: unexpected pair `%s` in value from pair `%s` for rule `%s`' % (sub_pair.line, sub_pair.key, last_pair_name, rule.name))
-
-				state = iter(states).next()
+			state = self._validate_members(dfa, value.object.pairs, verbose)
 
 			if not dfa.isFinalState(state):
 				raise JsonValidatorError('error: line `%d`: unexpected end in value from pair `%s` for rule `%s`' % (value.line, last_pair_name, rule.name))
 
-			return rule.name
+			return column
 
 		#############################################################
 		# ARRAY							    #
@@ -434,22 +621,22 @@ class Validator(jsonv.JsonParser.Parser):
 
 			rule = None
 
-			for rule_name in closure:
+			for symbol, column in closure:
 
-				RULE = self.RULES[rule_name]
+				RULE = self.SYMBOLS[symbol]
 
 				if RULE.json_type == 'array':
 					rule = RULE
 					break
 
 			if rule is None:
-				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for value of type `%s` from pair `%s`' % (value.line, expected, value.getTypeString(), last_pair_name))
+				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for value of type `%s` from pair `%s`' % (value.line, self._expected(closure), value.getTypeString(), last_pair_name))
 
 			#####################################################
 			# GET DFA & INITIAL STATE			    #
 			#####################################################
 
-			dfa = rule.EXPR.table
+			dfa = rule.EXPR.dense
 
 			state = dfa.start
 
@@ -458,19 +645,15 @@ class Validator(jsonv.JsonParser.Parser):
 			#####################################################
 
 			for sub_value in value.value.array.values:
-				transitions = dfa.transitions.get(state, dict())
+				state = dfa.transitions[state * dfa.width + self._validate_pair(dfa.closures[state], sub_value, verbose)]
 
-				states = transitions.get(self._validate_pair(transitions.keys(), sub_value, verbose), None)
-
-				if states is None:
+				if state < 0:
 					raise JsonValidatorError('error: line `%d`: unexpected value `%s` in value from pair `%s` for rule `%s`' % (sub_value.line, sub_value.getTypeString(), last_pair_name, rule.name))
 
-				state = iter(states).next()
-
 			if not dfa.isFinalState(state):
 				raise JsonValidatorError('error: line `%d`: unexpected end in value from pair `%s` for rule `%s`' % (value.line, last_pair_name, rule.name))
 
-			return rule.name
+			return column
 
 		#############################################################
 		# VALUE							    #
@@ -483,16 +666,16 @@ class Validator(jsonv.JsonParser.Parser):
 
 			rule = None
 
-			for rule_name in closure:
+			for symbol, column in closure:
 
-				RULE = self.RULES[rule_name]
+				RULE = self.SYMBOLS[symbol]
 
 				if RULE.json_type in ['bool', 'flt', 'str']:
 					rule = RULE
 					break
 
 			if rule is None:
-				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for value of type `%s` from pair `%s`' % (value.line, expected, value.getTypeString(), last_pair_name))
+				raise JsonValidatorError('error: line `%d`: no matching rule (among: %s) for value of type `%s` from pair `%s`' % (value.line, self._expected(closure), value.getTypeString(), last_pair_name))
 
 			#####################################################
 			# VALIDATE					    #
@@ -502,7 +685,7 @@ class Validator(jsonv.JsonParser.Parser):
 			JSON_TYPE = value.getTypeString()
 
 			if JSON_TYPE == 'null' or json_type == JSON_TYPE:
-				return rule.name
+				return column
 
 			else:
 				raise JsonValidatorError('error: line `%d`: type `%s` expected but type `%s` found in value from pair `%s` for rule `%s`' % (value.line, json_type, JSON_TYPE, last_pair_name, rule.name))
@@ -513,27 +696,17 @@ class Validator(jsonv.JsonParser.Parser):
 		root = doc.root
 
 		#############################################################
-		# GET DFA & INITIAL STATE				    #
+		# GET DFA						    #
 		#############################################################
 
-		dfa = self.entry.EXPR.table
-
-		state = dfa.start
+		dfa = self.entry.EXPR.dense
 
 		#############################################################
 		# VALIDATE						    #
 		#############################################################
 
 		try:
-			for pair in root.pairs:
-				transitions = dfa.transitions.get(state, dict())
-
-				states = transitions.get(self._validate_pair(transitions.keys(), pair, verbose), None)
-
-				if states is None:
-					raise JsonValidatorError('error: line `%d`: unexpected pair `%s`' % (pair.line, pair.key))
-
-				state = iter(states).next()
+			state = self._validate_members(dfa, root.pairs, verbose)
 
 			if not dfa.isFinalState(state):
 				raise JsonValidatorError('error: line `%d`: unexpected pair `%s`' % (root.line, root.key))
@@ -549,16 +722,215 @@ class Validator(jsonv.JsonParser.Parser):
 
 #############################################################################
 
-def parseString(s, verbose = False):
+def parseString(s, verbose = False, minimize = True, cache = None, construction = 'thompson'):
+	#####################################################################
+	# `cache` is a directory where the compiled grammars are kept,	    #
+	# keyed by a hash of their text (see `_cacheKey`). An entry holds   #
+	# the rules and their dense automata as JSON: on a hit, the	    #
+	# grammar is neither parsed nor compiled, so that the validator	    #
+	# has no `root`. The verbose mode always compiles.		    #
+	#####################################################################
 
 	try:
-		return Validator(s, verbose)
+		if cache is None or verbose:
+			return Validator(s, verbose, minimize = minimize, construction = construction)
+
+		key = _cacheKey(s, minimize, construction)
+
+		path = os.path.join(cache, key + '.jsonvc')
+
+		result = _loadCache(path, key)
+
+		if result is None:
+			result = Validator(s, verbose, minimize = minimize, construction = construction)
+
+			_storeCache(path, key, result)
+
+		return result
 
 	except jsonv.JsonParser.JsonParserError, e:
 		raise JsonValidatorError(e.__str__())
 
 #############################################################################
 
+def _cacheKey(s, minimize, construction):
+
+	if isinstance(s, unicode):
+		s = s.encode('utf-8')
+
+	return hashlib.sha1('%d:%d:%s:%s' % (CACHE_VERSION, minimize, construction, s)).hexdigest()
+
+#############################################################################
+
+def _loadCache(path, key):
+	#####################################################################
+	# A missing, unreadable, stale (other version or key) or	    #
+	# malformed entry is ignored: the grammar is compiled and the	    #
+	# entry is written again					    #
+	#####################################################################
+
+	try:
+		f = open(path, 'rb')
+
+	except IOError:
+		return None
+
+	try:
+		try:
+			data = json.load(f)
+
+			if data['version'] != CACHE_VERSION or data['key'] != key:
+				return None
+
+			result = _loadValidator(data)
+
+		except Exception:
+			return None
+
+	finally:
+		f.close()
+
+	return result
+
+#############################################################################
+
+def _loadValidator(data):
+	#####################################################################
+	# The validator of an entry, built as Validator.__init__() does	    #
+	# but from the stored rules					    #
+	#####################################################################
+
+	result = Validator.__new__(Validator)
+
+	result.keys = {}
+	result.shared = None
+
+	result.root = None
+
+	result.verbose = False
+
+	result.RULES = {
+	}
+
+	result.RULE_KEYS = {
+	}
+
+	for rule in data['rules']:
+		json_key = rule['json_key']
+
+		if not json_key is None:
+			json_key = result.keys.setdefault(json_key, json_key)
+
+		result.RULES[rule['name']] = Rule(rule['type'], rule['name'], rule['expr'], json_key, rule['json_type'], line = rule['line'])
+
+		result.RULE_KEYS[rule['name']] = json_key
+
+		if not rule['json_type'] in ['object', 'array', 'bool', 'flt', 'str'] or (rule['json_type'] in ['object', 'array'] and rule['expr'] is None):
+			raise ValueError('invalid rule `%s`' % rule['name'])
+
+	if len(result.RULES) != len(data['rules']):
+		raise ValueError('redefined rule')
+
+	result.SYMBOLS = [result.RULES[rule_name] for rule_name in sorted(result.RULES)]
+
+	result.SYMBOL_IDS = dict((result.SYMBOLS[i].name, i) for i in xrange(len(result.SYMBOLS)))
+
+	#####################################################################
+	# AUTOMATA							    #
+	#####################################################################
+
+	for rule in data['rules']:
+
+		if not rule['expr'] is None:
+			result.RULES[rule['name']].EXPR = _loadExpr(rule, len(result.SYMBOLS))
+
+	result.entry = Rule('object', 'ENTRY', data['entry']['expr'], None, None, line = data['entry']['line'])
+
+	result.entry.EXPR = _loadExpr(data['entry'], len(result.SYMBOLS))
+
+	return result
+
+#############################################################################
+
+def _loadExpr(data, count):
+	return CompiledExpr(data['expr'], tuple(data['states']), jsonv.nfa.dense_from_data(data['dense'], count))
+
+#############################################################################
+
+def _dumpRule(rule):
+	result = {
+		'type': rule.type,
+		'name': rule.name,
+		'json_key': rule.json_key,
+		'json_type': rule.json_type,
+		'line': rule.line,
+		'expr': rule.expr,
+	}
+
+	if not rule.EXPR is None:
+		result['states'] = list(rule.EXPR.states)
+		result['dense'] = rule.EXPR.dense.to_data()
+
+	return result
+
+#############################################################################
+
+def _storeCache(path, key, validator):
+	#####################################################################
+	# The entry is written to a temporary file which is then renamed,   #
+	# so that concurrent readers never see a partial entry. The cache   #
+	# is best effort: errors are ignored.				    #
+	#####################################################################
+
+	directory = os.path.dirname(path)
+
+	try:
+		if not os.path.isdir(directory):
+			os.makedirs(directory)
+
+		fd, temp = tempfile.mkstemp(suffix = '.tmp', dir = directory)
+
+		try:
+			f = os.fdopen(fd, 'wb')
+
+			try:
+				json.dump({
+					'version': CACHE_VERSION,
+					'key': key,
+					'entry': _dumpRule(validator.entry),
+					'rules': [_dumpRule(rule) for rule in validator.SYMBOLS],
+				}, f)
+
+			finally:
+				f.close()
+
+			if sys.platform in ['win32', 'win64'] and os.path.exists(path):
+				os.remove(path)
+
+			os.rename(temp, path)
+
+		except Exception:
+			os.remove(temp)
+
+			raise
+
+	except Exception:
+		pass
+
+#############################################################################
+
+def clearCache(cache):
+
+	for path in glob.glob(os.path.join(cache, '*.jsonvc')):
+
+		try:
+			os.remove(path)
+
+		except OSError:
+			pass
+
+#############################################################################
+
 class Rule(object):
 	#####################################################################
 
@@ -575,12 +947,12 @@ class Rule(object):
 
 	#####################################################################
 
-	def compile(self, rule_keys, verbose = False):
+	def compile(self, rule_keys, verbose = False, minimize = True, symbols = None, construction = 'thompson'):
 
 		if not self.expr is None:
 
 			try:
-				self.EXPR = jsonv.ExprParser.parseString(self.expr, rule_keys, line = self.line)
+				self.EXPR = jsonv.ExprParser.parseString(self.expr, rule_keys, line = self.line, minimize = minimize, symbols = symbols, construction = construction)
 
 				if verbose:
 					#####################################
@@ -613,5 +985,27 @@ class Rule(object):
 
 		if not self.expr is None:
 			print('   ::= %s' % self.EXPR.__str__())
+			print('   states: %d -> %d' % self.EXPR.states)
+
+#############################################################################
+
+class CompiledExpr(object):
+	#####################################################################
+	# Stands for the ExprParser.Parser of a rule restored from the	    #
+	# cache: only the dense automaton and the state counts are kept	    #
+	#####################################################################
+
+	def __init__(self, expr, states, dense):
+		self.expr = expr
+		self.states = states
+		self.dense = dense
+
+		self.root = None
+		self.table = None
+
+	#####################################################################
+
+	def __str__(self):
+		return self.expr
 
 #############################################################################
@@ -0,0 +1,178 @@
+#############################################################################
+# Author  : Jerome ODIER
+#
+# Email   : jerome.odier@lpsc.in2p3.fr
+#
+# Version : 1.0 beta (2013)
+#
+#############################################################################
+# `json` engine of `JsonParser.parseString`: the tree is built by the
+# (C accelerated) stdlib `json` scanner and its lines are recovered on
+# demand.
+#############################################################################
+
+import json, itertools, jsonv.JsonParser
+
+#############################################################################
+
+class AcceleratedParser(jsonv.JsonParser.Parser):
+	#####################################################################
+	# Tree built by the (C accelerated) stdlib `json` scanner. Inputs   #
+	# it rejects, or that this grammar reads differently, are parsed by #
+	# `Parser` instead, iteratively as they may be too deep for `json`. #
+	# Node lines are only recovered, by parsing the document again,	    #
+	# when one is read (see `_LineRecovery`).			    #
+	#####################################################################
+
+	def __init__(self, s, line = 1, lazy_lines = False, iterative = False, lazy_subtrees = False, keys = None, shared = None):
+
+		self.shared = shared
+
+		try:
+			root = self._load(s, line, keys)
+
+		except (ValueError, RuntimeError):
+			root = None
+
+		if root is None:
+			jsonv.JsonParser.Parser.__init__(self, s, line = line, raw = isinstance(s, str), lazy = isinstance(s, str), lazy_lines = lazy_lines, iterative = True, lazy_subtrees = lazy_subtrees, keys = keys, shared = shared)
+
+		else:
+			self.keys = keys
+
+			self.tokenizer = None
+
+			self.index = root._index
+
+			self.lazy = False
+			self.lazy_subtrees = False
+
+			self.iterative = iterative
+
+			self.root = root
+
+	#####################################################################
+
+	def _load(self, s, line, keys):
+
+		#############################################################
+		# `\r` is a space for `json`, not for this grammar	    #
+		#############################################################
+
+		if s.find('\r') >= 0:
+			return None
+
+		#############################################################
+		# Each node gets a sequence number in place of its line	    #
+		#############################################################
+
+		index = _LineRecovery(s, line)
+
+		counter = itertools.count()
+
+		def number(text):
+			return jsonv.JsonParser.NumberValue(text, line = next(counter), index = index)
+
+		def constant(text):
+			raise ValueError('invalid number `%s`' % text)
+
+		def wrap(value):
+
+			if   isinstance(value, jsonv.JsonParser.Value):
+				result = value
+			elif value is True:
+				result = jsonv.JsonParser.Value(jsonv.JsonParser.Value.TYPE_TRUE, value = u'true', line = next(counter), index = index)
+			elif value is False:
+				result = jsonv.JsonParser.Value(jsonv.JsonParser.Value.TYPE_FALSE, value = u'false', line = next(counter), index = index)
+			elif value is None:
+				result = jsonv.JsonParser.Value(jsonv.JsonParser.Value.TYPE_NULL, value = u'null', line = next(counter), index = index)
+			elif isinstance(value, list):
+				result = jsonv.JsonParser.Value(jsonv.JsonParser.Value.TYPE_ARRAY, array = jsonv.JsonParser.Array([wrap(item) for item in value], line = next(counter), index = index), line = next(counter), index = index)
+			else:
+				result = jsonv.JsonParser.Value(jsonv.JsonParser.Value.TYPE_STR, line = next(counter), index = index)
+				result._data = value
+
+			if not self.shared is None:
+				result = self.share(result)
+
+			return result
+
+		def pairs(items):
+			L = []
+
+			for key, value in items:
+				pair = jsonv.JsonParser.Pair(None, wrap(value), line = next(counter), index = index)
+
+				if not keys is None:
+					key = keys.setdefault(key, key)
+
+				pair._key = key
+
+				L.append(pair)
+
+			return jsonv.JsonParser.Value(jsonv.JsonParser.Value.TYPE_OBJECT, object = jsonv.JsonParser.Object(L, line = next(counter), index = index), line = next(counter), index = index)
+
+		#############################################################
+
+		result = json.loads(s, object_pairs_hook = pairs, parse_int = number, parse_float = number, parse_constant = constant)
+
+		if not isinstance(result, jsonv.JsonParser.Value) or result.type != jsonv.JsonParser.Value.TYPE_OBJECT:
+			return None
+
+		index.root = result.object
+
+		return index.root
+
+#############################################################################
+
+class _LineRecovery(object):
+	#####################################################################
+	# Line index of a tree built by AcceleratedParser: on first use,    #
+	# the document is parsed by `Parser` and both trees are walked in   #
+	# lockstep to map each sequence number to the line of its node.	    #
+	#####################################################################
+
+	def __init__(self, s, line = 1):
+		self.s = s
+		self.line = line
+
+		self.root = None
+		self.lines = None
+
+	#####################################################################
+
+	def resolve(self, offset):
+
+		if self.lines is None:
+			raw = isinstance(self.s, str)
+
+			parser = jsonv.JsonParser.Parser(self.s, line = self.line, raw = raw, lazy = raw, iterative = True)
+
+			lines = {}
+
+			stack = [(self.root, parser.root)]
+
+			while len(stack) > 0:
+				a, b = stack.pop()
+
+				lines[a._line] = b.line
+
+				if   isinstance(a, jsonv.JsonParser.Object):
+					stack.extend(zip(a.pairs, b.pairs))
+				elif isinstance(a, jsonv.JsonParser.Array):
+					stack.extend(zip(a.values, b.values))
+				elif isinstance(a, jsonv.JsonParser.Pair):
+					stack.append((a.value, b.value))
+				elif a.type == jsonv.JsonParser.Value.TYPE_OBJECT:
+					stack.append((a.object, b.object))
+				elif a.type == jsonv.JsonParser.Value.TYPE_ARRAY:
+					stack.append((a.array, b.array))
+
+			self.lines = lines
+
+			self.s = None
+			self.root = None
+
+		return self.lines[offset]
+
+#############################################################################
@@ -0,0 +1,227 @@
+#############################################################################
+# Author  : Jerome ODIER
+#
+# Email   : jerome.odier@lpsc.in2p3.fr
+#
+# Version : 1.0 beta (2013)
+#
+#############################################################################
+# Incremental engines, driven by `JsonParser.EventParser`: the push-style
+# `FeedParser` builds the tree from pieces of input and `iterparse` pulls
+# the events from a string or a file-like object.
+#############################################################################
+
+import codecs, jsonv.my_tokenizer, jsonv.JsonParser
+
+#############################################################################
+
+class FeedParser(jsonv.JsonParser.EventParser):
+	#####################################################################
+
+	def __init__(self, line = 1, encoding = 'utf-8', keys = None):
+		jsonv.JsonParser.EventParser.__init__(self, line = line)
+
+		self.keys = keys
+
+		self.tokenizer = jsonv.my_tokenizer.IncrementalTokenizer(spaces = jsonv.JsonParser.Tokenizer.SPACES, symbols = jsonv.JsonParser.Tokenizer.SYMBOLS, strings = jsonv.JsonParser.Tokenizer.STRINGS, line = line)
+
+		self.decoder = codecs.getincrementaldecoder(encoding)()
+
+		self.nodes = []
+
+		self.root = None
+
+	#####################################################################
+
+	def feed(self, s):
+
+		if isinstance(s, str):
+			s = self.decoder.decode(s)
+
+		try:
+			tokens, lines = self.tokenizer.feed(s)
+
+		except jsonv.my_tokenizer.TokenizerError, e:
+			raise jsonv.JsonParser.JsonParserError(e.__str__())
+
+		self._build(tokens, lines)
+
+	#####################################################################
+
+	def close(self):
+
+		try:
+			tokens, lines = self.tokenizer.feed(self.decoder.decode('', True))
+			self._build(tokens, lines)
+
+			tokens, lines = self.tokenizer.close()
+			self._build(tokens, lines)
+
+		except jsonv.my_tokenizer.TokenizerError, e:
+			raise jsonv.JsonParser.JsonParserError(e.__str__())
+
+		self.finish()
+
+		return self.root
+
+	#####################################################################
+
+	def _build(self, tokens, lines):
+
+		for i in xrange(len(tokens)):
+
+			token = tokens[i]
+			line = lines[i]
+
+			event = self.push(jsonv.JsonParser.Tokenizer.getTokenType(token, line), token, line)
+
+			if event is None:
+				continue
+
+			kind = event[0]
+
+			#####################################################
+			# CONTAINERS					    #
+			#####################################################
+
+			if   kind == 'start_object':
+				self.nodes.append([list([]), line, None, line])
+
+			elif kind == 'start_array':
+				self.nodes.append([list([]), line, None, line])
+
+			elif kind == 'key':
+				self.nodes[-1][2] = token
+				self.nodes[-1][3] = line
+
+			elif kind == 'end_object' or kind == 'end_array':
+				L, line, key, key_line = self.nodes.pop()
+
+				if kind == 'end_array':
+					value = jsonv.JsonParser.Value(jsonv.JsonParser.Value.TYPE_ARRAY, array = jsonv.JsonParser.Array(L, line = line), line = line)
+				else:
+					value = jsonv.JsonParser.Value(jsonv.JsonParser.Value.TYPE_OBJECT, object = jsonv.JsonParser.Object(L, line = line), line = line)
+
+				if len(self.nodes) == 0:
+					self.root = value.object
+				else:
+					self._append(value)
+
+			#####################################################
+			# PRIMITIVES					    #
+			#####################################################
+
+			elif event[1] == jsonv.JsonParser.Value.TYPE_STR:
+				self._append(jsonv.JsonParser.LazyValue(token, 0, len(token), line = line))
+
+			elif event[1] == jsonv.JsonParser.Value.TYPE_FLT:
+				self._append(jsonv.JsonParser.NumberValue(token, line = line))
+
+			else:
+				self._append(jsonv.JsonParser.Value(event[1], value = token, line = line))
+
+	#####################################################################
+
+	def _append(self, value):
+		L, line, key, key_line = self.nodes[-1]
+
+		if self.stack[-1]:
+			L.append(jsonv.JsonParser.Pair(key, value, line = key_line, keys = self.keys))
+		else:
+			L.append(value)
+
+	#####################################################################
+
+	def to_python(self):
+		return self.root.to_python()
+
+	#####################################################################
+
+	def to_string(self):
+		return self.root.to_string()
+
+	#####################################################################
+
+	__str__ = to_string
+
+#############################################################################
+
+def iterparse(s, line = 1, size = 65536):
+	#####################################################################
+	# Pull API: yields the events of `EventParser` (with decoded keys)  #
+	# without building the tree. `s` is a string or a file-like object, #
+	# the latter being tokenized `size` bytes at a time.		    #
+	#####################################################################
+
+	parser = jsonv.JsonParser.EventParser(line = line)
+
+	#####################################################################
+	# FILE-LIKE OBJECTS						    #
+	#####################################################################
+
+	if hasattr(s, 'read'):
+		tokenizer = jsonv.my_tokenizer.IncrementalTokenizer(spaces = jsonv.JsonParser.Tokenizer.SPACES, symbols = jsonv.JsonParser.Tokenizer.SYMBOLS, strings = jsonv.JsonParser.Tokenizer.STRINGS, line = line)
+
+		decoder = codecs.getincrementaldecoder('utf-8')()
+
+		while not parser.done():
+			chunk = s.read(size)
+
+			eof = len(chunk) == 0
+
+			if isinstance(chunk, str):
+				chunk = decoder.decode(chunk, eof)
+
+			try:
+				tokens, lines = tokenizer.feed(chunk)
+
+				if eof:
+					tokens2, lines2 = tokenizer.close()
+
+					tokens += tokens2
+					lines += lines2
+
+			except jsonv.my_tokenizer.TokenizerError, e:
+				raise jsonv.JsonParser.JsonParserError(e.__str__())
+
+			for i in xrange(len(tokens)):
+				event = parser.push(jsonv.JsonParser.Tokenizer.getTokenType(tokens[i], lines[i]), tokens[i], lines[i])
+
+				if not event is None:
+
+					if event[0] == 'key':
+						yield ('key', jsonv.JsonParser.unquote(event[1]), event[2])
+					else:
+						yield event
+
+				if parser.done():
+					break
+
+			if eof:
+				break
+
+	#####################################################################
+	# STRINGS							    #
+	#####################################################################
+
+	else:
+		tokenizer = jsonv.JsonParser.Tokenizer(s, line = line, raw = isinstance(s, str))
+
+		while tokenizer.hasNext() and not parser.done():
+			line = tokenizer.peekLine()
+			type = tokenizer.peekType()
+
+			event = parser.push(type, tokenizer.next(), line)
+
+			if not event is None:
+
+				if event[0] == 'key':
+					yield ('key', jsonv.JsonParser.unquote(event[1]), event[2])
+				else:
+					yield event
+
+	#####################################################################
+
+	parser.finish()
+
+#############################################################################
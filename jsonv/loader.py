@@ -0,0 +1,196 @@
+#############################################################################
+# Author  : Jerome ODIER
+#
+# Email   : jerome.odier@lpsc.in2p3.fr
+#
+# Version : 1.0 beta (2013)
+#
+#############################################################################
+# One-pass loader: the Python values of a document are built straight
+# from the scanner matches, following the state table of
+# `JsonParser.EventParser`, without building the tree.
+#############################################################################
+
+import jsonv.my_tokenizer, jsonv.JsonParser
+
+#############################################################################
+
+def parseToPython(s, line = 1, keys = None):
+	#####################################################################
+	# Same as `parseString(s, line).to_python()` without the tree: the  #
+	# dicts, lists and scalars are built from the scanner matches in a  #
+	# single pass. A document that does not parse is handed over to	    #
+	# parseString() for the diagnostic.				    #
+	#####################################################################
+
+	if isinstance(s, str):
+		text = s.decode('utf-8')
+	else:
+		text = unicode(s)
+
+	result = _toPython(text, keys)
+
+	if result is None:
+		result = jsonv.JsonParser.parseString(s, line = line).to_python()
+
+	return result
+
+#############################################################################
+
+def _toPython(s, keys):
+
+	Tokenizer = jsonv.JsonParser.Tokenizer
+	EventParser = jsonv.JsonParser.EventParser
+	Value = jsonv.JsonParser.Value
+
+	unescape = jsonv.JsonParser.unescape
+	toNumber = jsonv.JsonParser.toNumber
+
+	scanner = jsonv.my_tokenizer._compile(Tokenizer.SPACES, Tokenizer.SYMBOLS, Tokenizer.STRINGS)
+
+	SYMBOL_TYPES = Tokenizer.SYMBOL_TYPES
+
+	TABLE = EventParser.TABLE
+
+	#####################################################################
+	# `stack` holds the enclosing containers as (L, is_object, key)	    #
+	#####################################################################
+
+	stack = []
+
+	L = None
+	is_object = True
+	key = None
+
+	state = EventParser.ROOT
+
+	result = None
+
+	for match in scanner.finditer(s):
+
+		kind = match.lastgroup
+
+		if kind == 'space':
+			continue
+
+		token = match.group()
+
+		#############################################################
+		# TOKEN TYPES (THE WHOLE INPUT IS CHECKED, AS Tokenizer)    #
+		#############################################################
+
+		if   kind == 'symbol':
+			type = SYMBOL_TYPES[token]
+
+		elif kind == 'string':
+			type = Value.TYPE_STR
+
+		elif kind == 'word':
+
+			if   token == 'null':
+				type = Value.TYPE_NULL
+				value = None
+			elif token == 'true':
+				type = Value.TYPE_TRUE
+				value = True
+			elif token == 'false':
+				type = Value.TYPE_FALSE
+				value = False
+			else:
+				type = Value.TYPE_FLT
+
+				value = toNumber(token)
+
+				if value is None:
+					return None
+
+		else:
+			return None
+
+		if state == EventParser.DONE:
+			continue
+
+		#############################################################
+		# GRAMMAR						    #
+		#############################################################
+
+		action = TABLE[state].get(type)
+
+		if action is None:
+			return None
+
+		if   action == EventParser.ACTION_OPEN_OBJECT:
+			stack.append((L, is_object, key))
+
+			L = {}
+			is_object = True
+			state = EventParser.OBJECT_KEY
+
+			continue
+
+		elif action == EventParser.ACTION_OPEN_ARRAY:
+			stack.append((L, is_object, key))
+
+			L = []
+			is_object = False
+			state = EventParser.ARRAY_VALUE
+
+			continue
+
+		elif action == EventParser.ACTION_CLOSE:
+			value = L
+
+			L, is_object, key = stack.pop()
+
+			if len(stack) == 0:
+				result = value
+
+				state = EventParser.DONE
+
+				continue
+
+		elif action == EventParser.ACTION_KEY:
+			key = unescape(token[1: -1])
+
+			if not keys is None:
+				key = keys.setdefault(key, key)
+
+			state = EventParser.OBJECT_COLON
+
+			continue
+
+		elif action == EventParser.ACTION_COLON:
+			state = EventParser.OBJECT_VALUE
+
+			continue
+
+		elif action == EventParser.ACTION_COMMA:
+
+			if is_object:
+				state = EventParser.OBJECT_KEY
+			else:
+				state = EventParser.ARRAY_VALUE
+
+			continue
+
+		elif type == Value.TYPE_STR:
+			value = unescape(token[1: -1])
+
+		#############################################################
+		# ATTACHES THE VALUE TO ITS CONTAINER			    #
+		#############################################################
+
+		if is_object:
+			L[key] = value
+
+			state = EventParser.OBJECT_NEXT
+		else:
+			L.append(value)
+
+			state = EventParser.ARRAY_NEXT
+
+	#####################################################################
+
+	return result
+
+#############################################################################
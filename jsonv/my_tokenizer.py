@@ -7,130 +7,384 @@
 #
 #############################################################################
 
+import re, array, bisect
+
+#############################################################################
+
 class TokenizerError(Exception):
 	pass
 
 #############################################################################
 
-def _shift(s, group, line):
-	result = len(group[0])
+_scanners = {}
+
+#############################################################################
+
+def _body(close):
+	#####################################################################
+	# unrolled loop: runs of plain characters, then escapes		    #
+	#####################################################################
+
+	return '[^%s\\\\]*(?:\\\\.[^%s\\\\]*)*' % (re.escape(close), re.escape(close))
+
+#############################################################################
+
+def _string(open, close):
+
+	if len(close) == 1:
+		return '%s%s%s' % (re.escape(open), _body(close), re.escape(close))
+
+	else:
+		return '%s(?:\\\\.|(?!%s)[^\\\\])*%s' % (re.escape(open), re.escape(close), re.escape(close))
+
+#############################################################################
+
+def _compile(spaces, symbols, strings):
+	#####################################################################
+	# One regex, one alternative per token class, tried in the same     #
+	# order as the historical character loop: spaces, symbols, strings, #
+	# unterminated strings and finally words.                           #
+	#####################################################################
+
+	key = (tuple(spaces), tuple(symbols), tuple(tuple(string) for string in strings))
+
+	result = _scanners.get(key)
+
+	if result is None:
+		patterns = []
+
+		#############################################################
+		# SPACES						    #
+		#############################################################
+
+		if len(spaces) > 0:
+			patterns.append('(?P<space>[%s]+)' % ''.join(re.escape(space) for space in spaces))
+
+		#############################################################
+		# SYMBOLS						    #
+		#############################################################
+
+		if len(symbols) > 0:
+			patterns.append('(?P<symbol>%s)' % '|'.join(re.escape(symbol) for symbol in symbols))
+
+		#############################################################
+		# STRINGS						    #
+		#############################################################
+
+		if len(strings) > 0:
+			patterns.append('(?P<string>%s)' % '|'.join(_string(string[0], string[1]) for string in strings))
 
-	while True:
-		idx = s.find(group[1], result)
+			for i in xrange(len(strings)):
+				patterns.append('(?P<open%d>%s)' % (i, re.escape(strings[i][0])))
 
-		if idx < 0:
-			raise TokenizerError('syntax error, line `%d`, missing token `%s`' % (line, group[1]))
+		#############################################################
+		# WORDS							    #
+		#############################################################
+
+		heads = list(symbols) + [string[0] for string in strings]
+
+		if len([head for head in heads if len(head) != 1]) == 0:
+
+			excluded = ''.join(re.escape(c) for c in list(spaces) + heads)
 
-		result = idx + len(group[1])
+			if len(excluded) > 0:
+				patterns.append('(?P<word>[^%s]+)' % excluded)
+			else:
+				patterns.append('(?P<word>.+)')
+
+		else:
+			excluded = ''.join(re.escape(c) for c in spaces)
+
+			patterns.append('(?P<word>(?:(?!%s)[^%s])+)' % ('|'.join(re.escape(head) for head in heads), excluded))
+
+		#############################################################
 
-		if s[idx - 1] != '\\':
-			break
+		result = _scanners[key] = re.compile('|'.join(patterns), re.DOTALL)
 
 	return result
 
 #############################################################################
 
-def tokenize(s, spaces = [], symbols = [], strings = [], line = 1):
-	s = unicode(s)
+def _count(s, c, start, end):
+	result = 0
+
+	idx = s.find(c, start, end)
+
+	while idx >= 0:
+		result += 1
+
+		idx = s.find(c, idx + 1, end)
+
+	return result
+
+#############################################################################
 
-	result_tokens = []
-	result_lines = []
+class LineIndex(object):
+	#####################################################################
+
+	def __init__(self, s, line = 1):
+		self.s = s
+		self.line = line
 
-	i = 0x0000
-	l = len(s)
+		self.newlines = None
 
-	word = ''
+	#####################################################################
 
-	while i < l:
+	def resolve(self, offset):
 		#############################################################
-		# LINES							    #
+		# The sorted newline offsets are only collected on demand   #
 		#############################################################
 
-		if s[i] == '\n':
-			line += 1
+		if self.newlines is None:
+			self.newlines = array.array('L')
+
+			idx = self.s.find('\n')
+
+			while idx >= 0:
+				self.newlines.append(idx)
+
+				idx = self.s.find('\n', idx + 1)
+
+		return self.line + bisect.bisect_left(self.newlines, offset)
+
+#############################################################################
+
+def tokenize_spans(s, spaces = [], symbols = [], strings = [], line = 1, track_lines = True):
+	#####################################################################
+	# Without `track_lines`, no line is computed and None is returned   #
+	# in place of the line array: see `LineIndex`.			    #
+	#####################################################################
+
+	result_starts = array.array('L')
+	result_ends = array.array('L')
+
+	if track_lines:
+		result_lines = array.array('i')
+	else:
+		result_lines = None
+
+	if hasattr(s, 'count'):
+		count = s.count
+	else:
+		count = lambda c, start, end: _count(s, c, start, end)
+
+	for match in _compile(spaces, symbols, strings).finditer(s):
+
+		kind = match.lastgroup
+		start, end = match.span()
 
 		#############################################################
-		# SAPCES						    #
+		# SYMBOLS						    #
 		#############################################################
 
-		if s[i] in spaces:
+		if kind == 'symbol':
+			result_starts.append(start)
+			result_ends.append(end)
 
-			if len(word) > 0 :
-				result_tokens.append(word)
+			if track_lines:
 				result_lines.append(line)
-				word = ''
-
-			i += 1
 
 			continue
 
 		#############################################################
-		# SYMBOLS						    #
+		# UNTERMINATED STRINGS					    #
 		#############################################################
 
-		found = False
+		if kind.startswith('open'):
 
-		for symbol in symbols:
+			if not track_lines:
+				line = LineIndex(s, line).resolve(start)
 
-			if s[i: ].startswith(symbol):
+			raise TokenizerError('syntax error, line `%d`, missing token `%s`' % (line, strings[int(kind[4: ])][1]))
 
-				if len(word) > 0 :
-					result_tokens.append(word)
-					result_lines.append(line)
-					word = ''
+		#############################################################
+		# STRINGS & WORDS					    #
+		#############################################################
 
-				j = i + len(symbol)
+		if kind != 'space':
+			result_starts.append(start)
+			result_ends.append(end)
 
-				result_tokens.append(s[i: j])
+			if track_lines:
 				result_lines.append(line)
 
-				i = j
+		#############################################################
+		# LINES							    #
+		#############################################################
 
-				found = True
-				break
+		if track_lines:
+			line += count('\n', start, end)
 
-		if found:
-			continue
+	#####################################################################
+
+	return result_starts, result_ends, result_lines
+
+#############################################################################
+
+def tokenize(s, spaces = [], symbols = [], strings = [], line = 1):
+	s = unicode(s)
+
+	starts, ends, lines = tokenize_spans(s, spaces = spaces, symbols = symbols, strings = strings, line = line)
+
+	return [s[starts[i]: ends[i]] for i in xrange(len(starts))], lines.tolist()
+
+#############################################################################
+
+class IncrementalTokenizer(object):
+	#####################################################################
+
+	def __init__(self, spaces = [], symbols = [], strings = [], line = 1):
+		self.scanner = _compile(spaces, symbols, strings)
+
+		self.strings = strings
+
+		self.prefixes = set([symbol for symbol in symbols if len([other for other in symbols if other != symbol and other.startswith(symbol)]) > 0])
 
 		#############################################################
-		# STRINGS						    #
+		# `bodies[i]` matches the characters of a literal of kind   #
+		# `i` up to its closing delimiter, None if it is not a	    #
+		# single character					    #
 		#############################################################
 
-		found = False
+		self.bodies = []
 
 		for string in strings:
 
-			if s[i: ].startswith(string[0]):
+			if len(string[1]) == 1:
+				self.bodies.append(re.compile(_body(string[1]), re.DOTALL))
+			else:
+				self.bodies.append(None)
 
-				if len(word) > 0 :
-					result_tokens.append(word)
-					result_lines.append(line)
-					word = ''
+		self.pieces = []
 
-				j = i + _shift(s[i: ], string, line)
+		self.pending = None
+		self.escaped = False
 
-				result_tokens.append(s[i: j])
-				result_lines.append(line)
+		self.line = line
 
-				i = j
+	#####################################################################
 
-				found = True
-				break
+	def feed(self, s):
+		s = unicode(s)
 
-		if found:
-			continue
+		self.pieces.append(s)
 
+		#############################################################
+		# A held back string literal is only rescanned once it is   #
+		# closed: until then, each new piece is checked on its own, #
+		# from the escape state left by the previous one.	    #
 		#############################################################
 
-		word += s[i]
-		i += 1
+		if self._isPending(s):
+			return [], []
+
+		return self._scan(False)
 
 	#####################################################################
 
-	if len(word) > 0 :
-		result_tokens.append(word)
-		result_lines.append(line)
+	def _isPending(self, s):
+
+		if self.pending is None:
+			return False
+
+		if len(s) == 0:
+			return True
+
+		if self.escaped:
+			i = 1
+		else:
+			i = 0
+
+		i = self.pending.match(s, i).end()
+
+		#############################################################
+		# a trailing backslash escapes the first character of the   #
+		# next piece						    #
+		#############################################################
+
+		self.escaped = i == len(s) - 1 and s[i] == '\\'
+
+		return i == len(s) or self.escaped
+
+	#####################################################################
+
+	def close(self):
+		return self._scan(True)
+
+	#####################################################################
+
+	def _scan(self, final):
+		s = ''.join(self.pieces)
+
+		result_tokens = []
+		result_lines = []
+
+		i = 0x0000
+		l = len(s)
+
+		self.pending = None
+
+		for match in self.scanner.finditer(s):
+
+			kind = match.lastgroup
+			token = match.group()
+
+			#####################################################
+			# PARTIAL TOKENS				    #
+			#####################################################
+
+			if not final:
+
+				if kind.startswith('open'):
+					self.pending = self.bodies[int(kind[4: ])]
+
+					if not self.pending is None:
+						self.escaped = self.pending.match(s, match.end()).end() < l
+
+					break
+
+				if match.end() == l and kind != 'space' and (kind != 'symbol' or token in self.prefixes):
+					break
+
+			#####################################################
+			# SYMBOLS					    #
+			#####################################################
+
+			if kind == 'symbol':
+				result_tokens.append(token)
+				result_lines.append(self.line)
+
+				i = match.end()
+
+				continue
+
+			#####################################################
+			# UNTERMINATED STRINGS				    #
+			#####################################################
+
+			if kind.startswith('open'):
+				raise TokenizerError('syntax error, line `%d`, missing token `%s`' % (self.line, self.strings[int(kind[4: ])][1]))
+
+			#####################################################
+			# STRINGS & WORDS				    #
+			#####################################################
+
+			if kind != 'space':
+				result_tokens.append(token)
+				result_lines.append(self.line)
+
+			#####################################################
+			# LINES						    #
+			#####################################################
+
+			self.line += token.count('\n')
+
+			i = match.end()
+
+		#############################################################
+
+		self.pieces = [s[i: ]] if i < l else []
 
-	return result_tokens, result_lines
+		return result_tokens, result_lines
 
 #############################################################################
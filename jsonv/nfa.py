@@ -7,6 +7,10 @@
 #
 #############################################################################
 
+import array
+
+#############################################################################
+
 epsilon = '_eps'
 
 #############################################################################
@@ -52,105 +56,276 @@ class Nfa(object):
 
 	#####################################################################
 
-	def epsilonClosure(self, state):
-		result1 = {state}
-		result2 = 0x00000
-
-		while True:
-			found = False
-
-			for state in result1:
+	def epsilonClosure(self, states):
+		#############################################################
+		# States reachable from `states` through epsilon	    #
+		# transitions only, as a frozenset (a DFA state key)	    #
+		#############################################################
 
-				if not self.transitions.get(state) is None and not self.transitions[state].get(epsilon) is None:
+		result = set(states)
 
-					l1 = len(result1)
-					result1 = result1.union(self.transitions[state][epsilon])
-					l2 = len(result1)
+		todo = list(result)
 
-					if l1 != l2:
-						found = True
+		while len(todo) > 0:
+			state = todo.pop()
 
-			if found == False:
+			for new_state in self.transitions.get(state, dict()).get(epsilon, set()):
 
-				for state in sorted(result1):
-					result2 = 10 * result2 + state
+				if not new_state in result:
+					result.add(new_state)
 
-				result2 *= 100
+					todo.append(new_state)
 
-				return result2, result1
+		return frozenset(result)
 
 	#####################################################################
 
 	def to_dfa(self):
-		todo = {}
-		done = {}
-		temp = {}
+		#############################################################
+		# Subset construction: each set of NFA states is numbered   #
+		# once, in discovery order, and each NFA state is closed    #
+		# once. Every DFA transition has a single target.	    #
+		#############################################################
+
+		closures = {}
+
+		def closure(states):
+			result = set()
+
+			for state in states:
+
+				if not state in closures:
+					closures[state] = self.epsilonClosure([state])
+
+				result.update(closures[state])
+
+			return frozenset(result)
 
 		#############################################################
 		# INITIAL CASE						    #
 		#############################################################
 
-		closure_state, closure_states = self.epsilonClosure(self.start)
+		start_states = closure([self.start])
+
+		ids = {start_states: 0}
+
+		todo = [start_states]
+
+		result = Nfa(0)
 
+		#############################################################
+		# LOOP OVER NEW STATES					    #
 		#############################################################
 
-		result = Nfa(closure_state)
+		while len(todo) > 0:
+			old_states = todo.pop()
 
-		todo[closure_state] = closure_states
+			old_id = ids[old_states]
 
-		for state in closure_states:
+			#####################################################
+			# ADD FINAL STATES				    #
+			#####################################################
 
-			if self.isFinalState(state):
-				result.addFinalState(closure_state)
+			if not self.final.isdisjoint(old_states):
+				result.addFinalState(old_id)
+
+			#####################################################
+			# MERGE THE TARGETS OF EACH TOKEN		    #
+			#####################################################
+
+			targets = {}
+
+			for old_state in old_states:
+
+				for token, new_states in self.transitions.get(old_state, dict()).iteritems():
+
+					if token != epsilon:
+						targets.setdefault(token, set()).update(new_states)
+
+			#####################################################
+			# ADD TRANSITIONS				    #
+			#####################################################
+
+			for token in sorted(targets):
+				new_states = closure(targets[token])
+
+				new_id = ids.get(new_states)
+
+				if new_id is None:
+					new_id = ids[new_states] = len(ids)
+
+					todo.append(new_states)
+
+				result.addTransition(old_id, token, new_id)
 
 		#############################################################
-		# LOOP OVER NEW STATES					    #
+
+		return result
+
+	#####################################################################
+
+	def countStates(self):
+		result = set(self.transitions)
+
+		for tokens in self.transitions.itervalues():
+
+			for new_states in tokens.itervalues():
+				result.update(new_states)
+
+		result.update(self.final)
+		result.add(self.start)
+
+		return len(result)
+
+	#####################################################################
+
+	def minimize(self):
+		#############################################################
+		# Hopcroft's partition refinement, for the automata built   #
+		# by to_dfa(). Transitions may be missing: the states that  #
+		# cannot reach a final state are dropped first and all the  #
+		# initial blocks are splitters (Valmari & Lehtinen), so the #
+		# cost only depends on the existing transitions. States are #
+		# renumbered 0..N-1 in breadth-first order from the start.  #
+		#############################################################
+
+		#############################################################
+		# INCOMING TRANSITIONS					    #
+		#############################################################
+
+		incoming = {}
+
+		for old_state, tokens in self.transitions.iteritems():
+
+			for token, new_states in tokens.iteritems():
+
+				if token != epsilon:
+					incoming.setdefault(iter(new_states).next(), []).append((token, old_state))
+
+		#############################################################
+		# STATES FROM WHICH A FINAL STATE CAN BE REACHED	    #
+		#############################################################
+
+		live = set(self.final)
+
+		todo = list(live)
+
+		while len(todo) > 0:
+
+			for token, old_state in incoming.get(todo.pop(), []):
+
+				if not old_state in live:
+					live.add(old_state)
+
+					todo.append(old_state)
+
+		#############################################################
+		# INITIAL PARTITION: FINAL & OTHER STATES		    #
+		#############################################################
+
+		blocks = [block for block in [live & self.final, live - self.final] if len(block) > 0]
+
+		block_of = {}
+
+		for i in xrange(len(blocks)):
+
+			for state in blocks[i]:
+				block_of[state] = i
+
+		todo = set(xrange(len(blocks)))
+
+		#############################################################
+		# REFINEMENT						    #
 		#############################################################
 
 		while len(todo) > 0:
+			#####################################################
+			# predecessors of the splitter, by token	    #
+			#####################################################
 
-			for todo_state in todo:
-				old_states = todo[todo_state]
+			predecessors = {}
 
+			for new_state in list(blocks[todo.pop()]):
+
+				for token, old_state in incoming.get(new_state, []):
+					predecessors.setdefault(token, []).append(old_state)
+
+			#####################################################
+
+			for old_states in predecessors.itervalues():
 				#############################################
-				# LOOP OVER TRANSITIONS			    #
+				# predecessors of the splitter, by block    #
 				#############################################
 
+				touched = {}
+
 				for old_state in old_states:
-					transition_tokens = self.transitions.get(old_state, dict())
+					touched.setdefault(block_of[old_state], set()).add(old_state)
 
-					for transition_token in transition_tokens:
-						new_states = transition_tokens.get(transition_token, set())
+				#############################################
+				# split the blocks partially touched	    #
+				#############################################
+
+				for i, part in touched.iteritems():
+
+					if len(part) < len(blocks[i]):
+						blocks[i] -= part
 
-						if transition_token != epsilon:
+						j = len(blocks)
 
-							for new_state in new_states:
-								closure_state, closure_states = self.epsilonClosure(new_state)
+						blocks.append(part)
 
-								if not closure_state in done:
-									#####################
-									# ADD TRANSITION    #
-									#####################
+						for state in part:
+							block_of[state] = j
 
-									result.addTransition(todo_state, transition_token, closure_state)
+						if i in todo or len(part) <= len(blocks[i]):
+							todo.add(j)
+						else:
+							todo.add(i)
 
-									temp[closure_state] = closure_states
+		#############################################################
+		# QUOTIENT AUTOMATON					    #
+		#############################################################
 
-									#####################
-									# ADD FINAL STATES  #
-									#####################
+		ids = {}
 
-									for state in closure_states:
+		result = Nfa(0)
 
-										if self.isFinalState(state):
-											result.addFinalState(closure_state)
+		if not self.start in live:
+			return result
 
-			#####################################################
+		ids[block_of[self.start]] = 0
+
+		todo = [self.start]
+
+		while len(todo) > 0:
+			old_state = todo.pop(0)
+
+			old_id = ids[block_of[old_state]]
+
+			if old_state in self.final:
+				result.addFinalState(old_id)
+
+			tokens = self.transitions.get(old_state, dict())
 
-			done.update(todo)
-			todo = {}
-			todo.update(temp)
-			temp = {}
+			for token in sorted(tokens):
+
+				if token == epsilon:
+					continue
+
+				new_state = iter(tokens[token]).next()
+
+				if not new_state in live:
+					continue
+
+				i = block_of[new_state]
+
+				if not i in ids:
+					ids[i] = len(ids)
+
+					todo.append(new_state)
+
+				result.addTransition(old_id, token, ids[i])
 
 		#############################################################
 
@@ -202,3 +377,209 @@ class Nfa(object):
 		return result + '}\n'
 
 #############################################################################
+
+class DenseDfa(object):
+	#####################################################################
+	# Dense form of a DFA built by to_dfa(): states are renumbered	    #
+	# 0..N-1 (breadth-first, start: 0), tokens are columns 0..W-1 and   #
+	# `transitions[state * W + column]` is the target state, or -1.	    #
+	# `final` is a bitset and `closures[state]` lists the (symbol,	    #
+	# column) pairs leaving `state`, `symbol` being the id `symbols`    #
+	# gives to the token. `futures[state]` is the set of the symbols    #
+	# which can still be read from `state` and `needs[state]` the set   #
+	# of the symbols read on every way from `state` to a final state    #
+	# (None if there is no such way).				    #
+	#####################################################################
+
+	def __init__(self, dfa, symbols):
+		self.tokens = sorted(dfa.alphabet - set([epsilon]))
+
+		self.width = len(self.tokens)
+
+		columns = dict((self.tokens[i], i) for i in xrange(self.width))
+
+		#############################################################
+		# STATES						    #
+		#############################################################
+
+		ids = {dfa.start: 0}
+
+		order = [dfa.start]
+
+		i = 0
+
+		while i < len(order):
+			tokens = dfa.transitions.get(order[i], dict())
+
+			for token in sorted(tokens):
+
+				if token != epsilon:
+					new_state = iter(tokens[token]).next()
+
+					if not new_state in ids:
+						ids[new_state] = len(order)
+
+						order.append(new_state)
+
+			i += 1
+
+		#############################################################
+		# TABLES						    #
+		#############################################################
+
+		self.start = 0
+		self.size = len(order)
+
+		self.transitions = array.array('i', [-1]) * (self.size * self.width)
+		self.final = array.array('B', [0]) * ((self.size + 7) >> 3)
+
+		self.closures = []
+
+		for old_state in order:
+			state = ids[old_state]
+
+			closure = []
+
+			tokens = dfa.transitions.get(old_state, dict())
+
+			for token in sorted(tokens):
+
+				if token != epsilon:
+					self.transitions[state * self.width + columns[token]] = ids[iter(tokens[token]).next()]
+
+					closure.append((symbols[token], columns[token]))
+
+			self.closures.append(tuple(closure))
+
+			if dfa.isFinalState(old_state):
+				self.final[state >> 3] |= 1 << (state & 7)
+
+		#############################################################
+		# FUTURES						    #
+		#############################################################
+
+		futures = [set([symbol for symbol, column in closure]) for closure in self.closures]
+
+		changed = True
+
+		while changed:
+			changed = False
+
+			for state in xrange(self.size - 1, -1, -1):
+
+				for symbol, column in self.closures[state]:
+					new_state = self.transitions[state * self.width + column]
+
+					if not futures[new_state] <= futures[state]:
+						futures[state] |= futures[new_state]
+
+						changed = True
+
+		self.futures = [frozenset(future) for future in futures]
+
+		#############################################################
+		# NEEDS							    #
+		#############################################################
+
+		needs = [frozenset() if self.isFinalState(state) else None for state in xrange(self.size)]
+
+		changed = True
+
+		while changed:
+			changed = False
+
+			for state in xrange(self.size - 1, -1, -1):
+
+				if self.isFinalState(state):
+					continue
+
+				need = None
+
+				for symbol, column in self.closures[state]:
+					new_state = self.transitions[state * self.width + column]
+
+					if not needs[new_state] is None:
+
+						if need is None:
+							need = needs[new_state] | frozenset([symbol])
+						else:
+							need &= needs[new_state] | frozenset([symbol])
+
+				if need != needs[state]:
+					needs[state] = need
+
+					changed = True
+
+		self.needs = needs
+
+	#####################################################################
+
+	def isFinalState(self, state):
+		return (self.final[state >> 3] >> (state & 7)) & 1 == 1
+
+	#####################################################################
+
+	def to_data(self):
+		#############################################################
+		# Plain lists, for JSON (see dense_from_data())		    #
+		#############################################################
+
+		return {
+			'tokens': self.tokens,
+			'transitions': self.transitions.tolist(),
+			'final': self.final.tolist(),
+			'closures': [[list(pair) for pair in closure] for closure in self.closures],
+			'futures': [sorted(future) for future in self.futures],
+			'needs': [sorted(need) if not need is None else None for need in self.needs],
+		}
+
+#############################################################################
+
+def dense_from_data(data, count):
+	#####################################################################
+	# The inverse of DenseDfa.to_data(), `count` being the number of    #
+	# symbols. Raises ValueError if `data` is not a consistent	    #
+	# automaton							    #
+	#####################################################################
+
+	result = DenseDfa.__new__(DenseDfa)
+
+	result.tokens = list(data['tokens'])
+
+	result.width = len(result.tokens)
+
+	result.start = 0
+	result.size = len(data['closures'])
+
+	result.transitions = array.array('i', data['transitions'])
+	result.final = array.array('B', data['final'])
+
+	result.closures = [tuple([(symbol, column) for symbol, column in closure]) for closure in data['closures']]
+
+	result.futures = [frozenset(future) for future in data['futures']]
+	result.needs = [frozenset(need) if not need is None else None for need in data['needs']]
+
+	#####################################################################
+	# CHECK								    #
+	#####################################################################
+
+	sizes = [len(result.transitions), len(result.final), len(result.futures), len(result.needs)]
+
+	if result.size == 0 or sizes != [result.size * result.width, (result.size + 7) >> 3, result.size, result.size]:
+		raise ValueError('invalid dense automaton')
+
+	for new_state in result.transitions:
+
+		if new_state < -1 or new_state >= result.size:
+			raise ValueError('invalid dense automaton')
+
+	for state in xrange(result.size):
+
+		for symbol, column in result.closures[state]:
+
+			if symbol < 0 or symbol >= count or column < 0 or column >= result.width or result.transitions[state * result.width + column] < 0:
+				raise ValueError('invalid dense automaton')
+
+	return result
+
+#############################################################################
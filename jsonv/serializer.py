@@ -0,0 +1,157 @@
+#############################################################################
+# Author  : Jerome ODIER
+#
+# Email   : jerome.odier@lpsc.in2p3.fr
+#
+# Version : 1.0 beta (2013)
+#
+#############################################################################
+# Streaming serializer for the trees of `JsonParser`.
+#############################################################################
+
+import jsonv.JsonParser
+
+#############################################################################
+
+def dump(tree, fp, encoding = 'utf-8', size = 65536):
+	#####################################################################
+	# Writes `tree` (a parser, Object, Array or Value) to `fp`, `size`  #
+	# characters at a time. The tree is walked with an explicit stack   #
+	# and lazy keys/strings are decoded for output without being kept.  #
+	# With `encoding` None, the chunks are written as unicode.	    #
+	#####################################################################
+
+	Value = jsonv.JsonParser.Value
+	Object = jsonv.JsonParser.Object
+	Array = jsonv.JsonParser.Array
+	LazyValue = jsonv.JsonParser.LazyValue
+	LazyPair = jsonv.JsonParser.LazyPair
+
+	escape = jsonv.JsonParser.escape
+	unescape = jsonv.JsonParser.unescape
+	getText = jsonv.JsonParser.getText
+
+	#####################################################################
+
+	if hasattr(tree, 'root'):
+		tree = tree.root
+
+	pieces = []
+	length = 0
+
+	#####################################################################
+	# `stack` holds the open containers as [iterator, is_object, first] #
+	#####################################################################
+
+	stack = []
+
+	node = tree
+
+	while True:
+
+		#############################################################
+		# NODE							    #
+		#############################################################
+
+		if isinstance(node, Value):
+
+			if   node.type == Value.TYPE_OBJECT:
+				node = node.object
+			elif node.type == Value.TYPE_ARRAY:
+				node = node.array
+
+		if   isinstance(node, Object):
+			piece = '{'
+
+			stack.append([iter(node.pairs), True, True])
+
+		elif isinstance(node, Array):
+			piece = '['
+
+			stack.append([iter(node.values), False, True])
+
+		elif node.type == Value.TYPE_STR:
+
+			if isinstance(node, LazyValue) and not node._source is None:
+				piece = '"%s"' % escape(unescape(getText(node._source, node._data + 1, node._end - 1)))
+			else:
+				piece = '"%s"' % escape(node.value)
+
+		elif node.type == Value.TYPE_TRUE:
+			piece = 'true'
+		elif node.type == Value.TYPE_FALSE:
+			piece = 'false'
+		elif node.type == Value.TYPE_NULL:
+			piece = 'null'
+		else:
+			piece = '%s' % node.value
+
+		pieces.append(piece)
+		length += len(piece)
+
+		#############################################################
+		# NEXT NODE (CLOSES THE EXHAUSTED CONTAINERS)		    #
+		#############################################################
+
+		node = None
+
+		while len(stack) > 0:
+			frame = stack[-1]
+
+			item = next(frame[0], None)
+
+			if item is None:
+				stack.pop()
+
+				if frame[1]:
+					piece = '}'
+				else:
+					piece = ']'
+
+			else:
+
+				if frame[2]:
+					frame[2] = False
+
+					piece = ''
+				else:
+					piece = ','
+
+				if frame[1]:
+
+					if isinstance(item, LazyPair) and item._key is None:
+						key = unescape(getText(item._source, item._start + 1, item._end - 1))
+					else:
+						key = item.key
+
+					piece += '"%s":' % escape(key)
+
+					node = item.value
+				else:
+					node = item
+
+			pieces.append(piece)
+			length += len(piece)
+
+			if not node is None:
+				break
+
+		#############################################################
+		# FLUSH							    #
+		#############################################################
+
+		if length >= size or node is None:
+			chunk = ''.join(pieces)
+
+			if not encoding is None:
+				chunk = chunk.encode(encoding)
+
+			fp.write(chunk)
+
+			pieces = []
+			length = 0
+
+		if node is None:
+			break
+
+#############################################################################
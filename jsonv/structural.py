@@ -0,0 +1,255 @@
+#############################################################################
+# Author  : Jerome ODIER
+#
+# Email   : jerome.odier@lpsc.in2p3.fr
+#
+# Version : 1.0 beta (2013)
+#
+#############################################################################
+# Stage-1 structural indexer (in the style of simdjson): the byte buffer
+# is classified in bulk with numpy (escapes, quotes, in-string regions,
+# structural characters, spaces and words) and the token spans are built
+# from the resulting masks, block after block.
+#
+# Its output is identical to `my_tokenizer.tokenize_spans`. Inputs that
+# the masks cannot describe exactly (unicode strings, backslashes or other
+# string delimiters outside `"` strings, unterminated strings) are handed
+# over to `my_tokenizer.tokenize_spans`. `token_types` then types all the
+# symbols and strings at once from their first byte, leaving the words.
+#############################################################################
+
+import array, jsonv.my_tokenizer
+
+#############################################################################
+
+try:
+	import numpy
+
+except ImportError:
+	numpy = None
+
+#############################################################################
+
+BLOCK_SIZE = 1 << 20
+
+#############################################################################
+
+def _table(chars):
+	result = numpy.zeros(256, dtype = numpy.bool_)
+
+	for c in chars:
+		result[ord(c)] = True
+
+	return result
+
+#############################################################################
+
+def _to_array(typecode, values):
+	result = array.array(typecode)
+
+	if result.typecode == 'i':
+		dtype = numpy.dtype('int%d' % (8 * result.itemsize))
+	else:
+		dtype = numpy.dtype('uint%d' % (8 * result.itemsize))
+
+	result.fromstring(values.astype(dtype).tostring())
+
+	return result
+
+#############################################################################
+
+def _from_array(values):
+
+	if len(values) == 0:
+		return numpy.zeros(0, dtype = numpy.int64)
+
+	if values.typecode == 'i':
+		dtype = numpy.dtype('int%d' % (8 * values.itemsize))
+	else:
+		dtype = numpy.dtype('uint%d' % (8 * values.itemsize))
+
+	return numpy.frombuffer(values, dtype = dtype)
+
+#############################################################################
+
+def token_types(s, starts, table, other = 0xFF):
+	#####################################################################
+	# Types of the tokens at `starts`, looked up by their first byte in #
+	# `table` (a dict). Tokens starting with another byte, the words,   #
+	# are typed `other` and their indices are returned as a list, for   #
+	# the caller to classify. None for unicode strings.		    #
+	#####################################################################
+
+	if numpy is None:
+		raise ImportError('the structural indexer requires numpy')
+
+	if isinstance(s, unicode):
+		return None
+
+	if len(starts) == 0:
+		return array.array('B'), []
+
+	#####################################################################
+
+	codes = numpy.empty(256, dtype = numpy.uint8)
+
+	codes.fill(other)
+
+	for c, type in table.iteritems():
+		codes[ord(c)] = type
+
+	#####################################################################
+
+	types = codes[numpy.frombuffer(s, dtype = numpy.uint8)[_from_array(starts)]]
+
+	result = array.array('B')
+
+	result.fromstring(types.tostring())
+
+	return result, numpy.flatnonzero(types == other).tolist()
+
+#############################################################################
+
+def tokenize_spans(s, spaces = [], symbols = [], strings = [], line = 1, track_lines = True):
+
+	if numpy is None:
+		raise ImportError('the structural indexer requires numpy')
+
+	#####################################################################
+	# INPUTS THE MASKS CANNOT DESCRIBE				    #
+	#####################################################################
+
+	if isinstance(s, unicode) or len(s) == 0 or not ['"', '"'] in [list(string) for string in strings]:
+		return jsonv.my_tokenizer.tokenize_spans(s, spaces = spaces, symbols = symbols, strings = strings, line = line, track_lines = track_lines)
+
+	#####################################################################
+
+	SPACES = _table(spaces)
+	SYMBOLS = _table(symbols)
+	OTHERS = _table([string[0] for string in strings if string[0] != '"'] + ['\\'])
+
+	buffer = numpy.frombuffer(s, dtype = numpy.uint8)
+
+	#####################################################################
+
+	result_starts = []
+	result_ends = []
+	result_lines = []
+
+	carry_backslashes = 0
+	carry_parity = 0
+	carry_word = False
+	carry_newlines = 0
+
+	for base in xrange(0, len(buffer), BLOCK_SIZE):
+
+		b = buffer[base: base + BLOCK_SIZE]
+
+		n = len(b)
+
+		idx = numpy.arange(n, dtype = numpy.int64)
+
+		#############################################################
+		# ESCAPED CHARACTERS (ODD RUN OF BACKSLASHES BEFORE THEM)   #
+		#############################################################
+
+		backslashes = b == 0x5C
+
+		last = numpy.maximum.accumulate(numpy.where(backslashes, -1 - carry_backslashes, idx))
+
+		run = numpy.empty(n, dtype = numpy.int64)
+		run[0] = carry_backslashes
+		run[1: ] = idx[: -1] - last[: -1]
+
+		escaped = (run & 1) == 1
+
+		carry_backslashes = (n - 1) - last[-1]
+
+		#############################################################
+		# IN-STRING REGIONS (PREFIX PARITY OF UNESCAPED QUOTES)	    #
+		#############################################################
+
+		quotes = (b == 0x22) & ~escaped
+
+		parity = (numpy.cumsum(quotes) + carry_parity) & 1
+
+		carry_parity = parity[-1]
+
+		opening = quotes & (parity == 1)
+		closing = quotes & (parity == 0)
+
+		outside = (parity == 0) & ~quotes
+
+		if (outside & OTHERS[b]).any():
+			return jsonv.my_tokenizer.tokenize_spans(s, spaces = spaces, symbols = symbols, strings = strings, line = line, track_lines = track_lines)
+
+		#############################################################
+		# STRUCTURAL CHARACTERS, SPACES & WORDS			    #
+		#############################################################
+
+		structural = outside & SYMBOLS[b]
+
+		words = outside & ~structural & ~SPACES[b]
+
+		previous_words = numpy.empty(n, dtype = numpy.bool_)
+		previous_words[0] = carry_word
+		previous_words[1: ] = words[: -1]
+
+		next_words = numpy.empty(n, dtype = numpy.bool_)
+		next_words[-1] = True
+		next_words[: -1] = words[1: ]
+
+		word_starts = words & ~previous_words
+		word_lasts = words & ~next_words
+
+		#############################################################
+		# SPANS							    #
+		#############################################################
+
+		starts = numpy.flatnonzero(structural | opening | word_starts)
+		ends = numpy.flatnonzero(structural | closing | word_lasts) + 1
+
+		if carry_word and not words[0]:
+			result_ends.append(numpy.array([base], dtype = numpy.int64))
+
+		carry_word = bool(words[-1])
+
+		result_starts.append(starts + base)
+		result_ends.append(ends + base)
+
+		#############################################################
+		# LINES							    #
+		#############################################################
+
+		if track_lines:
+			newlines = numpy.cumsum(b == 0x0A)
+
+			before = newlines - (b == 0x0A)
+
+			result_lines.append(line + carry_newlines + before[starts])
+
+			carry_newlines += int(newlines[-1])
+
+	#####################################################################
+	# UNTERMINATED STRINGS						    #
+	#####################################################################
+
+	if carry_parity != 0:
+		return jsonv.my_tokenizer.tokenize_spans(s, spaces = spaces, symbols = symbols, strings = strings, line = line, track_lines = track_lines)
+
+	if carry_word:
+		result_ends.append(numpy.array([len(buffer)], dtype = numpy.int64))
+
+	#####################################################################
+
+	starts = _to_array('L', numpy.concatenate(result_starts))
+	ends = _to_array('L', numpy.concatenate(result_ends))
+
+	if track_lines:
+		lines = _to_array('i', numpy.concatenate(result_lines))
+	else:
+		lines = None
+
+	return starts, ends, lines
+
+#############################################################################
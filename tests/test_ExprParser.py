@@ -0,0 +1,177 @@
+#############################################################################
+# Author  : Jerome ODIER
+#
+# Email   : jerome.odier@lpsc.in2p3.fr
+#
+# Version : 1.0 beta (2013)
+#
+#############################################################################
+# Run from the top directory: python -m unittest discover -s tests
+#############################################################################
+
+import re, random, itertools, unittest, jsonv.nfa, jsonv.ExprParser
+
+#############################################################################
+
+RULES = ['a', 'b', 'c']
+
+RULE_KEYS = dict((rule_name, None) for rule_name in RULES)
+
+#############################################################################
+
+CONSTRUCTIONS = ['thompson', 'glushkov']
+MINIMIZE = [False, True]
+
+#############################################################################
+
+def expression(rng, depth = 0):
+	#####################################################################
+	# Random expression of the `ExprParser` grammar			    #
+	#####################################################################
+
+	terms = []
+
+	for i in xrange(rng.randint(1, 3 - min(depth, 2))):
+		suffixes = []
+
+		for j in xrange(rng.randint(1, 3)):
+
+			if depth < 2 and rng.random() < 0.3:
+				factor = '(%s)' % expression(rng, depth + 1)
+			else:
+				factor = rng.choice(RULES)
+
+			suffixes.append(factor + rng.choice(['', '', '?', '+', '*']))
+
+		terms.append(', '.join(suffixes))
+
+	return ' | '.join(terms)
+
+#############################################################################
+
+def accepts(dfa, word):
+
+	state = dfa.start
+
+	for token in word:
+		new_states = dfa.transitions.get(state, dict()).get(token)
+
+		if new_states is None:
+			return False
+
+		state = iter(new_states).next()
+
+	return dfa.isFinalState(state)
+
+#############################################################################
+
+def acceptsDense(dense, word):
+
+	columns = dict((dense.tokens[i], i) for i in xrange(dense.width))
+
+	state = dense.start
+
+	for token in word:
+
+		if not token in columns:
+			return False
+
+		state = dense.transitions[state * dense.width + columns[token]]
+
+		if state < 0:
+			return False
+
+	return dense.isFinalState(state)
+
+#############################################################################
+
+WORDS = [''.join(word) for n in xrange(6) for word in itertools.product(RULES, repeat = n)]
+
+#############################################################################
+
+class AutomataTestCase(unittest.TestCase):
+	#####################################################################
+
+	def testLanguages(self):
+		#############################################################
+		# The automata, minimized or not, accept the language of    #
+		# the equivalent regular expression			    #
+		#############################################################
+
+		rng = random.Random(1)
+
+		for n in xrange(150):
+			s = expression(rng)
+
+			sizes = set()
+
+			for construction in CONSTRUCTIONS:
+
+				for minimize in MINIMIZE:
+					parser = jsonv.ExprParser.parseString(s, RULE_KEYS, minimize = minimize, construction = construction)
+
+					#####################################
+					# a lone rule is repeated (`a*`)    #
+					#####################################
+
+					if jsonv.ExprParser.Node.isRule(parser.root.nodeType):
+						regex = re.compile('(?:%s)*\\Z' % parser.root.nodeValue)
+					else:
+						regex = re.compile('(?:%s)\\Z' % s.replace(',', '').replace(' ', ''))
+
+					for word in WORDS:
+						expected = not regex.match(word) is None
+
+						self.assertEqual(accepts(parser.table, word), expected, '%s (%s, %s): %r' % (s, construction, minimize, word))
+						self.assertEqual(acceptsDense(parser.dense, word), expected, '%s (%s, %s): %r' % (s, construction, minimize, word))
+
+					before, after = parser.states
+
+					self.assertTrue(after <= before)
+
+					if minimize:
+						sizes.add(after)
+
+			#####################################################
+			# the minimal automaton is unique		    #
+			#####################################################
+
+			self.assertEqual(len(sizes), 1, s)
+
+	#####################################################################
+
+	def testMinimalSize(self):
+
+		for s, size in [('a', 1), ('a*', 1), ('a, b', 3), ('a, b?', 3), ('(a | b)*, c', 2), ('a+ | b+', 3), ('(a, b)* | (a, b)+', 2)]:
+
+			for construction in CONSTRUCTIONS:
+				self.assertEqual(jsonv.ExprParser.parseString(s, RULE_KEYS, construction = construction).states[1], size, '%s (%s)' % (s, construction))
+
+	#####################################################################
+
+	def testDenseDfa(self):
+		parser = jsonv.ExprParser.parseString('a, (b | c)*', RULE_KEYS, symbols = {'a': 7, 'b': 8, 'c': 9})
+
+		dense = parser.dense
+
+		self.assertEqual(dense.tokens, ['a', 'b', 'c'])
+		self.assertEqual(dense.start, 0)
+		self.assertEqual(dense.size, 2)
+		self.assertEqual(dense.closures[0], ((7, 0), ))
+		self.assertEqual(dense.closures[1], ((8, 1), (9, 2)))
+		self.assertFalse(dense.isFinalState(0))
+		self.assertTrue(dense.isFinalState(1))
+
+	#####################################################################
+
+	def testErrors(self):
+
+		for s in ['a,', 'd', 'a | ', ')', '|a']:
+			self.assertRaises(jsonv.ExprParser.ExprParserError, jsonv.ExprParser.parseString, s, RULE_KEYS)
+
+#############################################################################
+
+if __name__ == '__main__':
+	unittest.main()
+
+#############################################################################
@@ -0,0 +1,511 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+# Author  : Jerome ODIER
+#
+# Email   : jerome.odier@lpsc.in2p3.fr
+#
+# Version : 1.0 beta (2013)
+#
+#############################################################################
+# Run from the top directory: python -m unittest discover -s tests
+#############################################################################
+
+import io, os, sys, tempfile, unittest, jsonv.my_tokenizer, jsonv.JsonParser, jsonv.incremental, jsonv.loader, jsonv.serializer, jsonv.structural
+
+J = jsonv.JsonParser
+
+#############################################################################
+
+try:
+	import numpy
+
+except ImportError:
+	numpy = None
+
+#############################################################################
+
+VALID = [
+	u'{}',
+	u'{"a": 1}',
+	u'{"a": [1, 2.5, -3e2, "x\\\\ny", true, false, null, {"k": "v\\"q"}],\n"b": {"c": [], "d": {}},\n"u": "é\\u00e9\\ud83d\\ude00"}',
+	u'{\n\t"a":\n\t[\n\t\t{"b": [[], [[]], {}]},\n\t\t"c"\n\t],\n\t"d": "multi\nline\nstring",\n\t"e": 0\n}',
+	u'{"a": [1,], "b": {"c": 1,},}',
+	u'{"dup": 1, "dup": 2}',
+	u'{"x": "\\\\", "y": "\\\\\\\\", "z": "\\"\\\\"}',
+	u'{"a": {"b": {"c": {"d": [1, [2, [3, {"e": null}]]]}}}}',
+	u'{"a": 1} {"ignored": 2}',
+	u'{"s": "' + u'z' * 5000 + u'", "t": ["{[", "]}", ":,"]}',
+]
+
+INVALID = [
+	u'',
+	u'   \n\n  ',
+	u'[1]',
+	u'{"a" 1}',
+	u'{"a": }',
+	u'{1: 2}',
+	u'{"a": [1 2]}',
+	u'{"a": 1',
+	u'{"a": tru}',
+	u'{"a":\n\n "b}',
+	u'{,}',
+	u'{"a": [,]}',
+	u'{"a": [1,,2]}',
+	u'{"a":\n[',
+	u'{"a"',
+	u'{"a":',
+	u'{"a": [1',
+	u'{"a": nan}',
+	u'{"a": .5}',
+	u'{"a": 01}',
+	u'{"a": 1,\r\n"b": 2}',
+	u'{"r1": {"a": [1, {"b" 2}]}}',
+	u'{"r1": [1, 2}, "r2": 3}',
+	u'{"a": "x\ny",\n "b" 1}',
+	u'{"r1": {"a,b:c"}',
+	u'{"r1": {"a": 1 "b": 2}, "r2": [{}]}',
+	u'{"r1": [[1], [2] [3]]}',
+	u'{"r1": [{"a": 1}, {"b": {,}}]}',
+	u'{"r1": {"a": {}, }, "r2": [[], , []]}',
+	u'{"r1": {"a": [1, 2]: 3}}',
+	u'{"r1": {{}}}',
+	u'{"r1": [{"a": 1},\n\n{"b" [2]}]}',
+]
+
+#############################################################################
+
+def signature(node):
+	#####################################################################
+	# Values, keys and lines of a tree, as nested tuples		    #
+	#####################################################################
+
+	if isinstance(node, J.Value):
+
+		if   node.type == J.Value.TYPE_OBJECT:
+			return ('object', node.line, signature(node.object))
+		elif node.type == J.Value.TYPE_ARRAY:
+			return ('array', node.line, signature(node.array))
+		else:
+			return (node.type, node.line, node.to_python())
+
+	if isinstance(node, J.Object):
+		return (node.line, tuple([(pair.line, pair.key, signature(pair.value)) for pair in node.pairs]))
+
+	if isinstance(node, J.Array):
+		return (node.line, tuple([signature(value) for value in node.values]))
+
+	raise TypeError(node)
+
+#############################################################################
+
+def feed(s, size):
+	parser = jsonv.incremental.FeedParser()
+
+	s = s.encode('utf-8')
+
+	for i in xrange(0, len(s), size):
+		parser.feed(s[i: i + size])
+
+	return parser.close()
+
+#############################################################################
+
+def events(s, **kwds):
+	#####################################################################
+	# Rebuilds the tree signature from the events of `iterparse`	    #
+	#####################################################################
+
+	stack = [[None, []]]
+
+	for event in jsonv.incremental.iterparse(s, **kwds):
+
+		kind = event[0]
+
+		if   kind == 'start_object' or kind == 'start_array':
+			stack.append([event[1], []])
+
+		elif kind == 'key':
+			stack[-1][1].append((event[2], event[1]))
+
+		else:
+
+			if   kind == 'end_object':
+				line, L = stack.pop()
+				value = ('object', line, (line, tuple([(key[0], key[1], value) for key, value in zip(L[0:: 2], L[1:: 2])])))
+			elif kind == 'end_array':
+				line, L = stack.pop()
+				value = ('array', line, (line, tuple(L)))
+			else:
+				value = (event[1], event[3], J.Value(event[1], value = event[2]).to_python() if event[1] != J.Value.TYPE_FLT else J.NumberValue(event[2]).to_python())
+
+			stack[-1][1].append(value)
+
+	return stack[0][1][0][2]
+
+#############################################################################
+
+def documents(s):
+	#####################################################################
+	# An empty stream holds no document, there is nothing to compare    #
+	#####################################################################
+
+	for root in J.parseDocuments(s):
+		return signature(root)
+
+	return None
+
+#############################################################################
+
+def parseFile(s, **kwds):
+	fd, path = tempfile.mkstemp()
+
+	try:
+		os.write(fd, s.encode('utf-8'))
+		os.close(fd)
+
+		parser = J.parseFile(path, **kwds)
+
+		return signature(parser.root)
+
+	finally:
+		os.remove(path)
+
+#############################################################################
+
+ENGINES = [
+	('recursive', lambda s: signature(J.parseString(s).root)),
+	('bytes', lambda s: signature(J.parseString(s.encode('utf-8')).root)),
+	('iterative', lambda s: signature(J.parseString(s, iterative = True).root)),
+	('iterative/bytes', lambda s: signature(J.parseString(s.encode('utf-8'), iterative = True).root)),
+	('lazy_lines', lambda s: signature(J.parseString(s, lazy_lines = True).root)),
+	('lazy_lines/iterative', lambda s: signature(J.parseString(s.encode('utf-8'), lazy_lines = True, iterative = True).root)),
+	('json', lambda s: signature(J.parseString(s, engine = 'json').root)),
+	('json/bytes', lambda s: signature(J.parseString(s.encode('utf-8'), engine = 'json').root)),
+	('documents', documents),
+	('file', lambda s: parseFile(s)),
+	('feed/1', lambda s: signature(feed(s, 1))),
+	('feed/7', lambda s: signature(feed(s, 7))),
+	('feed/all', lambda s: signature(feed(s, 1 << 20))),
+	('iterparse', lambda s: events(s)),
+	('iterparse/file', lambda s: events(io.BytesIO(s.encode('utf-8')), size = 3)),
+]
+
+if not numpy is None:
+	ENGINES.append(('numpy', lambda s: signature(J.parseString(s, engine = 'numpy').root)))
+	ENGINES.append(('numpy/bytes', lambda s: signature(J.parseString(s.encode('utf-8'), engine = 'numpy').root)))
+	ENGINES.append(('numpy/lazy_lines', lambda s: signature(J.parseString(s.encode('utf-8'), engine = 'numpy', lazy_lines = True, iterative = True).root)))
+
+#############################################################################
+
+def run(f, s):
+
+	try:
+		return ('ok', f(s))
+
+	except J.JsonParserError, e:
+		return ('error', str(e))
+
+#############################################################################
+
+class TokenizerTestCase(unittest.TestCase):
+	#####################################################################
+
+	def testTokenize(self):
+		tokens, lines = jsonv.my_tokenizer.tokenize(u'{"a":\n [1, "x\\""]}', spaces = J.Tokenizer.SPACES, symbols = J.Tokenizer.SYMBOLS, strings = J.Tokenizer.STRINGS)
+
+		self.assertEqual(tokens, [u'{', u'"a"', u':', u'[', u'1', u',', u'"x\\""', u']', u'}'])
+		self.assertEqual(lines, [1, 1, 1, 2, 2, 2, 2, 2, 2])
+
+		self.assertRaises(jsonv.my_tokenizer.TokenizerError, jsonv.my_tokenizer.tokenize, u'{"a', spaces = J.Tokenizer.SPACES, symbols = J.Tokenizer.SYMBOLS, strings = J.Tokenizer.STRINGS)
+
+	#####################################################################
+
+	def testTypedArrays(self):
+		tokenizer = J.Tokenizer(u'{"a": 1}')
+
+		self.assertEqual([buffer.typecode for buffer in [tokenizer.starts, tokenizer.ends, tokenizer.lines, tokenizer.types]], ['L', 'L', 'i', 'B'])
+		self.assertEqual(tokenizer.types.tolist(), [J.Tokenizer.LBRACE, J.Value.TYPE_STR, J.Tokenizer.COLON, J.Value.TYPE_FLT, J.Tokenizer.RBRACE])
+
+#############################################################################
+
+class EngineAgreementTestCase(unittest.TestCase):
+	#####################################################################
+
+	def check(self, documents, engines):
+
+		for s in documents:
+			expected = run(ENGINES[0][1], s)
+
+			for name, f in engines:
+				result = run(f, s)
+
+				if result != ('ok', None):
+					self.assertEqual(result, expected, '%s: %r' % (name, s[: 60]))
+
+	#####################################################################
+
+	def testValid(self):
+		self.check(VALID, ENGINES)
+
+	#####################################################################
+
+	def testInvalid(self):
+		self.check(INVALID, ENGINES)
+
+	#####################################################################
+
+	@unittest.skipIf(numpy is None, 'numpy is not installed')
+	def testStructuralBlocks(self):
+		#############################################################
+		# Masks carried over block boundaries			    #
+		#############################################################
+
+		BLOCK_SIZE = jsonv.structural.BLOCK_SIZE
+
+		try:
+			for size in [1, 2, 3, 7, 64]:
+				jsonv.structural.BLOCK_SIZE = size
+
+				self.check(VALID + INVALID, [('numpy/%d' % size, lambda s: signature(J.parseString(s.encode('utf-8'), engine = 'numpy').root))])
+
+		finally:
+			jsonv.structural.BLOCK_SIZE = BLOCK_SIZE
+
+	#####################################################################
+
+	def testLazySubtrees(self):
+		lazy_subtrees = [
+			('lazy_subtrees', lambda s: signature(J.parseString(s, lazy_subtrees = True).root)),
+			('lazy_subtrees/iterative', lambda s: signature(J.parseString(s.encode('utf-8'), iterative = True, lazy_subtrees = True).root)),
+		]
+
+		self.check(VALID + INVALID, lazy_subtrees)
+
+	#####################################################################
+
+	def testToPython(self):
+
+		for s in VALID + INVALID:
+			expected = run(lambda s: J.parseString(s).to_python(), s)
+
+			self.assertEqual(run(jsonv.loader.parseToPython, s), expected, repr(s[: 60]))
+			self.assertEqual(run(lambda s: jsonv.loader.parseToPython(s.encode('utf-8')), s), expected, repr(s[: 60]))
+
+	#####################################################################
+
+	def testDump(self):
+
+		for s in VALID:
+			parser = J.parseString(s)
+
+			for size in [1, 7, 1 << 20]:
+				f = io.BytesIO()
+
+				jsonv.serializer.dump(parser, f, size = size)
+
+				self.assertEqual(J.parseString(f.getvalue()).to_python(), parser.to_python())
+				self.assertEqual(f.getvalue().decode('utf-8'), parser.to_string())
+
+	#####################################################################
+
+	def testDeepDocuments(self):
+		s = u'{"a": ' + u'[' * 5000 + u']' * 5000 + u'}'
+
+		J.parseString(s, iterative = True)
+		J.parseString(s, engine = 'json')
+		J.parseString(s.encode('utf-8'), engine = 'json')
+		jsonv.loader.parseToPython(s)
+
+		jsonv.serializer.dump(J.parseString(s, iterative = True), io.BytesIO())
+
+#############################################################################
+
+class FeedParserTestCase(unittest.TestCase):
+	#####################################################################
+
+	def testEscapesAcrossPieces(self):
+		s = u'{"a": "\\\\", "b": "x\\"y\\\\\\"z\\\\", "c": ["\\\\\\\\", "\\"\\"", "\\u00e9\\\\"]}'
+
+		expected = J.parseString(s).to_python()
+
+		for size in xrange(1, 10):
+			self.assertEqual(feed(s, size).to_python(), expected, size)
+
+	#####################################################################
+
+	def testLongEscapedString(self):
+		#############################################################
+		# A literal held back over many pieces is scanned once	    #
+		#############################################################
+
+		s = u'{"a": "' + (u'x' * 1000 + u'\\"') * 256 + u'", "b": [1, 2]}'
+
+		parser = jsonv.incremental.FeedParser()
+
+		tokenizer = parser.tokenizer
+
+		scan = tokenizer._scan
+		scanned = [0]
+
+		def _scan(final):
+			scanned[0] += sum(len(piece) for piece in tokenizer.pieces)
+
+			return scan(final)
+
+		tokenizer._scan = _scan
+
+		for i in xrange(0, len(s), 1024):
+			parser.feed(s[i: i + 1024])
+
+		self.assertEqual(parser.close().to_python(), J.parseString(s).to_python())
+
+		self.assertTrue(scanned[0] < 3 * len(s), scanned[0])
+
+#############################################################################
+
+class BehaviourTestCase(unittest.TestCase):
+	#####################################################################
+
+	def error(self, s, **kwds):
+
+		try:
+			J.parseString(s, **kwds)
+
+		except J.JsonParserError, e:
+			return str(e)
+
+		self.fail('no error for %r' % s)
+
+	#####################################################################
+
+	def message(self, line, s):
+
+		if sys.platform in ['win32', 'win64']:
+			return 'syntax error, line `%d`, %s' % (line, s)
+		else:
+			return 'syntax error, line `%d`, \033[31m%s\033[0m' % (line, s)
+
+	#####################################################################
+
+	def testEscapedBackslashBeforeQuote(self):
+		self.assertEqual(J.parseString(u'{"a": "x\\\\", "b": "\\\\\\""}').to_python(), {u'a': u'x\\', u'b': u'\\"'})
+		self.assertEqual(J.parseString('{"a\\\\": 1}').to_python(), {u'a\\': 1})
+
+	#####################################################################
+
+	def testEmptyInput(self):
+
+		for s in [u'', '', u' \n ']:
+			self.assertRaises(J.JsonParserError, J.parseString, s)
+
+		self.assertEqual(self.error(u''), self.message(1, 'missing root object'))
+
+	#####################################################################
+
+	def testInvalidNumbers(self):
+
+		for token in ['nan', 'NaN', 'Infinity', '.5', '01', '-01', '1.', '+1', '1e']:
+			self.assertEqual(self.error(u'{"a": %s}' % token), self.message(1, 'unexpected token `%s`' % token))
+
+		self.assertEqual(J.parseString(u'{"a": [0, -0, 0.5, 1e5, -1.5E-3]}').to_python(), {u'a': [0, 0, 0.5, 1e5, -1.5e-3]})
+
+	#####################################################################
+
+	def testMultilineStrings(self):
+		self.assertEqual(self.error(u'{"a": "x\ny",\n "b" 1}'), self.message(3, 'missing `:`'))
+
+		parser = J.parseString(u'{"a": "x\n\ny",\n"b": 1}')
+
+		self.assertEqual(parser.root.getPair(u'b').line, 4)
+
+	#####################################################################
+
+	def testSlots(self):
+		root = J.parseString(u'{"a": [1, "x", true]}').root
+
+		for node in [root, root.pairs[0], root.pairs[0].value, root.pairs[0].value.array] + root.pairs[0].value.array.values:
+			self.assertFalse(hasattr(node, '__dict__'), node)
+
+	#####################################################################
+
+	def testMembers(self):
+		root = J.parseString(u'{"b": 1, "a": 2, "b": 3}').root
+
+		self.assertEqual([pair.key for pair in root.pairs], [u'b', u'a', u'b'])
+		self.assertEqual(root.getValue(u'b').to_python(), 3)
+		self.assertEqual(root.getValue(u'c'), None)
+
+		root.pairs.append(J.Pair(u'"c"', J.NumberValue(u'4')))
+
+		self.assertEqual(root.getValue(u'c').to_python(), 4)
+
+	#####################################################################
+
+	def testCarriageReturn(self):
+		self.assertEqual(self.error(u'{"a": 1,\r\n"b": 2}'), self.message(1, 'unexpected token `\r`'))
+		self.assertEqual(self.error(u'{\n"a":\r1}'), self.message(2, 'unexpected token `\r1`'))
+
+	#####################################################################
+
+	def testKeys(self):
+		s = u'{"abc": {"abc": 1}}'
+
+		for parse in [J.parseString, lambda s, **kwds: J.parseString(s.encode('utf-8'), **kwds), lambda s, **kwds: J.parseString(s, engine = 'json', **kwds)]:
+			parser = parse(s)
+
+			self.assertEqual(parser.keys, None)
+
+			keys = {}
+
+			a = parse(s, keys = keys).root.pairs[0]
+			b = parse(s, keys = keys).root.pairs[0]
+
+			self.assertTrue(a.key is b.key and a.key is a.value.object.pairs[0].key)
+			self.assertEqual(keys, {u'abc': u'abc'})
+
+	#####################################################################
+
+	def testShared(self):
+		shared = {}
+
+		a = J.parseString('{"k": ["x", "x", "\\u0078"], "l": {"k": 1}, "m": {"k": 1}}', shared = shared).root
+		b = J.parseString('{"k": ["x", "x", "\\u0078"]}', line = 10, shared = shared).root
+
+		x, y, z = a.pairs[0].value.array.values
+
+		self.assertTrue(x is y and not x is z)
+		self.assertTrue(a.pairs[1].value is a.pairs[2].value)
+		self.assertTrue(b.pairs[0].value is a.pairs[0].value)
+
+		#############################################################
+		# nothing is decoded by the fingerprints		    #
+		#############################################################
+
+		self.assertTrue(a.pairs[0]._key is None and not x._source is None)
+
+		self.assertEqual([x.value, z.value], [u'x', u'x'])
+		self.assertEqual(b.pairs[0].line, 10)
+		self.assertEqual(b.pairs[0].value.line, 1)
+
+	#####################################################################
+
+	def testSharedLines(self):
+		#############################################################
+		# a shared value has the line of its first occurrence, the  #
+		# pairs have their own					    #
+		#############################################################
+
+		for kwds in [{}, {'iterative': True}, {'engine': 'json'}, {'engine': 'json', 'iterative': True}]:
+			root = J.parseString('{"a":{"k":1},\n"b":{"k":1},\n"c":{"k":1}}', shared = {}, **kwds).root
+
+			self.assertEqual([pair.line for pair in root.pairs], [1, 2, 3], kwds)
+			self.assertEqual([pair.value.line for pair in root.pairs], [1, 1, 1], kwds)
+
+			self.assertTrue(root.pairs[1].value is root.pairs[0].value and root.pairs[2].value is root.pairs[0].value)
+
+#############################################################################
+
+if __name__ == '__main__':
+	unittest.main()
+
+#############################################################################
@@ -0,0 +1,353 @@
+#############################################################################
+# Author  : Jerome ODIER
+#
+# Email   : jerome.odier@lpsc.in2p3.fr
+#
+# Version : 1.0 beta (2013)
+#
+#############################################################################
+# Run from the top directory: python -m unittest discover -s tests
+#############################################################################
+
+import re, time, random, shutil, tempfile, itertools, unittest, jsonv.JsonParser, jsonv.JsonValidator
+
+#############################################################################
+
+GRAMMAR = '''{
+	"entry": "doc",
+	"pair": {"rule": "doc", "key": "doc", "type": "object", "::=": "name, size?, tags?, items?"},
+	"pair": {"rule": "name", "key": "name", "type": "str"},
+	"pair": {"rule": "size", "key": "size", "type": "flt"},
+	"pair": {"rule": "tags", "key": "tags", "type": "array", "::=": "tag*"},
+	"value": {"rule": "tag", "type": "str"},
+	"pair": {"rule": "items", "key": "items", "type": "array", "::=": "item+"},
+	"value": {"rule": "item", "type": "object", "::=": "name, size"}
+}'''
+
+DOCUMENTS = [
+	('{"doc": {"name": "x", "size": 3, "tags": ["a", "b"]}}', True),
+	('{"doc": {"size": 3, "name": "x"}}', True),
+	('{"doc": {"name": "x", "tags": []}}', True),
+	('{"doc": {"name": "x", "size": null}}', True),
+	('{"doc": {"name": "x", "size": "3"}}', False),
+	('{"doc": {"size": 3}}', False),
+	('{"doc": {"name": "x", "tags": [1]}}', False),
+	('{"doc": {"name": "x", "bogus": 1}}', False),
+	('{"doc": {"name": "x", "name": "y"}}', False),
+	('{"doc": {"name": "x"}, "doc": {"name": "y"}}', True),
+	('{"other": {}}', False),
+]
+
+#############################################################################
+
+class ValidatorTestCase(unittest.TestCase):
+	#####################################################################
+
+	def check(self, validator):
+
+		for s, expected in DOCUMENTS:
+			self.assertEqual(validator.validate(jsonv.JsonParser.parseString(s)), expected, s)
+			self.assertEqual(validator.validate(jsonv.JsonParser.parseString(s, engine = 'json')), expected, s)
+
+	#####################################################################
+
+	def testValidate(self):
+
+		for construction in ['thompson', 'glushkov']:
+
+			for minimize in [False, True]:
+				self.check(jsonv.JsonValidator.parseString(GRAMMAR, minimize = minimize, construction = construction))
+
+	#####################################################################
+
+	def testSharedKeys(self):
+		validator = jsonv.JsonValidator.parseString(GRAMMAR)
+
+		for s, expected in DOCUMENTS:
+			self.assertEqual(validator.validate(jsonv.JsonParser.parseString(s, keys = validator.keys)), expected, s)
+
+	#####################################################################
+
+	def testErrors(self):
+
+		for s in ['{"entry": 1}', '{"pair": {"rule": "a", "type": "str"}}', '{"value": {"rule": "a", "type": "int"}}', '{"entry": "a", "value": {"rule": "a", "type": "object"}}', '{"entry": "b", "value": {"rule": "a", "type": "str"}}', '{"entry": "doc"']:
+			self.assertRaises(jsonv.JsonValidator.JsonValidatorError, jsonv.JsonValidator.parseString, s)
+
+#############################################################################
+
+MEMBERS = ['alpha', 'mid', 'zeta']
+
+#############################################################################
+
+def members(expr):
+	#####################################################################
+	# Grammar of a `doc` object whose members (str) follow `expr`	    #
+	#####################################################################
+
+	rules = ['"pair": {"rule": "%s", "key": "%s", "type": "str"}' % (name, name) for name in MEMBERS]
+
+	return '{"entry": "doc", "pair": {"rule": "doc", "key": "doc", "type": "object", "::=": "%s"}, %s}' % (expr, ', '.join(rules))
+
+#############################################################################
+
+def document(keys):
+	return '{"doc": {%s}}' % ', '.join('"%s": "%d"' % (keys[i], i) for i in xrange(len(keys)))
+
+#############################################################################
+
+class MemberOrderTestCase(unittest.TestCase):
+	#####################################################################
+	# Object members may come in any order				    #
+	#####################################################################
+
+	def check(self, expr, cases):
+		validator = jsonv.JsonValidator.parseString(members(expr))
+
+		for keys, expected in cases:
+
+			for order in itertools.permutations(keys):
+				self.assertEqual(validator.validate(jsonv.JsonParser.parseString(document(order))), expected, '%s: %s' % (expr, order))
+
+	#####################################################################
+
+	def testGroups(self):
+		self.check('(zeta, alpha)?, mid', [
+			(['zeta', 'alpha', 'mid'], True),
+			(['mid'], True),
+			(['alpha', 'mid'], False),
+			(['zeta', 'alpha'], False),
+		])
+
+		self.check('(alpha, mid) | (zeta, mid)', [
+			(['mid', 'zeta'], True),
+			(['alpha', 'mid'], True),
+			(['alpha', 'zeta', 'mid'], False),
+		])
+
+	#####################################################################
+
+	def testOptional(self):
+		self.check('alpha?, mid, zeta?', [
+			(['mid'], True),
+			(['zeta', 'mid'], True),
+			(['alpha', 'zeta', 'mid'], True),
+			(['alpha', 'zeta'], False),
+			([], False),
+		])
+
+	#####################################################################
+
+	def testRepeated(self):
+		self.check('alpha+, mid*', [
+			(['mid', 'alpha', 'mid', 'alpha'], True),
+			(['alpha'], True),
+			(['mid'], False),
+			(['mid', 'zeta', 'alpha'], False),
+		])
+
+		self.check('(alpha, mid)+', [
+			(['mid', 'alpha', 'mid', 'alpha'], True),
+			(['mid', 'alpha', 'alpha'], False),
+		])
+
+	#####################################################################
+
+	def testManyKeys(self):
+		#############################################################
+		# Searching the orders must not take exponential time	    #
+		#############################################################
+
+		keys = ['k%d' % i for i in xrange(25)]
+
+		rules = ['"pair": {"rule": "%s", "key": "%s", "type": "str"}' % (key, key) for key in keys + ['z']]
+
+		for expr, order, expected in [
+			('(%s)*, z' % ' | '.join(keys), keys, False),
+			('(%s)*, z' % ' | '.join(keys), keys + ['z', 'z'], False),
+			('(%s)*, z' % ' | '.join(keys), ['z'] + keys, True),
+			(', '.join('%s?' % key for key in keys), list(reversed(keys)), True),
+			('(%s)*' % ' | '.join('(%s, %s)' % (keys[i], keys[(i + 1) % 25]) for i in xrange(25)), keys, False),
+		]:
+			validator = jsonv.JsonValidator.parseString('{"entry": "doc", "pair": {"rule": "doc", "key": "doc", "type": "object", "::=": "%s"}, %s}' % (expr, ', '.join(rules)))
+
+			start = time.time()
+
+			self.assertEqual(validator.validate(jsonv.JsonParser.parseString(document(order))), expected, expr)
+
+			self.assertLess(time.time() - start, 2.0, expr)
+
+	#####################################################################
+
+	def testRandom(self):
+		#############################################################
+		# A document is valid iff some order of its members is	    #
+		# accepted by the equivalent regular expression		    #
+		#############################################################
+
+		rng = random.Random(1)
+
+		for n in xrange(40):
+			expr = ', '.join('%s%s' % (rng.choice(MEMBERS + ['(alpha | zeta)', '(mid, zeta)']), rng.choice(['', '?', '+', '*'])) for i in xrange(rng.randint(2, 3)))
+
+			regex = re.compile('(?:%s)\\Z' % expr.replace(', ', '').replace(' | ', '|').replace('alpha', 'a').replace('mid', 'm').replace('zeta', 'z'))
+
+			validator = jsonv.JsonValidator.parseString(members(expr))
+
+			for size in xrange(5):
+
+				for keys in itertools.combinations_with_replacement(MEMBERS, size):
+					expected = len([order for order in itertools.permutations(keys) if not regex.match(''.join(key[0] for key in order)) is None]) > 0
+
+					self.assertEqual(validator.validate(jsonv.JsonParser.parseString(document(list(reversed(keys))))), expected, '%s: %s' % (expr, keys))
+
+#############################################################################
+
+class CacheTestCase(unittest.TestCase):
+	#####################################################################
+
+	def setUp(self):
+		self.cache = tempfile.mkdtemp()
+
+	#####################################################################
+
+	def tearDown(self):
+		shutil.rmtree(self.cache)
+
+	#####################################################################
+
+	def testCache(self):
+		miss = jsonv.JsonValidator.parseString(GRAMMAR, cache = self.cache)
+		hit = jsonv.JsonValidator.parseString(GRAMMAR, cache = self.cache)
+
+		for validator in [miss, hit]:
+
+			for s, expected in DOCUMENTS:
+				self.assertEqual(validator.validate(jsonv.JsonParser.parseString(s)), expected, s)
+				self.assertEqual(validator.validate(jsonv.JsonParser.parseString(s, keys = validator.keys)), expected, s)
+
+		#############################################################
+		# a hit is the same validator as a miss			    #
+		#############################################################
+
+		self.assertEqual(hit.RULE_KEYS, miss.RULE_KEYS)
+		self.assertEqual(hit.SYMBOL_IDS, miss.SYMBOL_IDS)
+
+		for rule_name in miss.RULES:
+			RULE = hit.RULES[rule_name]
+
+			self.assertTrue(RULE.json_key is None or RULE.json_key is hit.keys[RULE.json_key])
+
+		for RULE, rule in [(hit.entry, miss.entry)] + [(hit.RULES[rule_name], miss.RULES[rule_name]) for rule_name in miss.RULES]:
+			self.assertEqual((RULE.type, RULE.name, RULE.expr, RULE.json_key, RULE.json_type, RULE.line), (rule.type, rule.name, rule.expr, rule.json_key, rule.json_type, rule.line))
+
+			if rule.EXPR is None:
+				self.assertEqual(RULE.EXPR, None)
+
+			else:
+				self.assertEqual(RULE.EXPR.states, rule.EXPR.states)
+				self.assertEqual(RULE.EXPR.dense.to_data(), rule.EXPR.dense.to_data())
+
+		#############################################################
+		# a hit neither parses nor compiles the grammar		    #
+		#############################################################
+
+		parseString = jsonv.JsonValidator.jsonv.ExprParser.parseString
+
+		def fail(*args, **kwds):
+			raise AssertionError('compiled on a hit')
+
+		jsonv.JsonValidator.jsonv.ExprParser.parseString = fail
+
+		try:
+			hit = jsonv.JsonValidator.parseString(GRAMMAR, cache = self.cache)
+
+		finally:
+			jsonv.JsonValidator.jsonv.ExprParser.parseString = parseString
+
+		self.assertEqual(hit.root, None)
+
+		#############################################################
+		# entries are plain data				    #
+		#############################################################
+
+		for path in jsonv.JsonValidator.glob.glob(self.cache + '/*.jsonvc'):
+			f = open(path, 'rb')
+			self.assertEqual(jsonv.JsonValidator.json.load(f)['version'], jsonv.JsonValidator.CACHE_VERSION)
+			f.close()
+
+		#############################################################
+		# the options are part of the key			    #
+		#############################################################
+
+		jsonv.JsonValidator.parseString(GRAMMAR, minimize = False, cache = self.cache)
+
+		self.assertEqual(len(jsonv.JsonValidator.glob.glob(self.cache + '/*.jsonvc')), 2)
+
+		jsonv.JsonValidator.clearCache(self.cache)
+
+		self.assertEqual(len(jsonv.JsonValidator.glob.glob(self.cache + '/*.jsonvc')), 0)
+
+	#####################################################################
+
+	def testStaleEntry(self):
+		key = jsonv.JsonValidator._cacheKey(GRAMMAR, True, 'thompson')
+
+		f = open(jsonv.JsonValidator.os.path.join(self.cache, key + '.jsonvc'), 'wb')
+		f.write('garbage')
+		f.close()
+
+		validator = jsonv.JsonValidator.parseString(GRAMMAR, cache = self.cache)
+
+		for s, expected in DOCUMENTS:
+			self.assertEqual(validator.validate(jsonv.JsonParser.parseString(s)), expected, s)
+
+	#####################################################################
+
+	def testTamperedEntry(self):
+		jsonv.JsonValidator.parseString(GRAMMAR, cache = self.cache)
+
+		path = jsonv.JsonValidator.os.path.join(self.cache, jsonv.JsonValidator._cacheKey(GRAMMAR, True, 'thompson') + '.jsonvc')
+
+		f = open(path, 'rb')
+		data = jsonv.JsonValidator.json.load(f)
+		f.close()
+
+		#############################################################
+		# each entry is malformed, the grammar is compiled again    #
+		#############################################################
+
+		def column(data):
+			data['entry']['dense']['closures'][0][0][1] = 1000
+
+		def transition(data):
+			data['entry']['dense']['transitions'][0] = 1000
+
+		def closures(data):
+			del data['entry']['dense']['closures']
+
+		def rule(data):
+			data['rules'][0]['json_type'] = 'object'
+			data['rules'][0]['expr'] = None
+
+		for tamper in [column, transition, closures, rule]:
+			entry = jsonv.JsonValidator.json.loads(jsonv.JsonValidator.json.dumps(data))
+
+			tamper(entry)
+
+			f = open(path, 'wb')
+			jsonv.JsonValidator.json.dump(entry, f)
+			f.close()
+
+			validator = jsonv.JsonValidator.parseString(GRAMMAR, cache = self.cache)
+
+			self.assertNotEqual(validator.root, None, tamper.__name__)
+
+			for s, expected in DOCUMENTS:
+				self.assertEqual(validator.validate(jsonv.JsonParser.parseString(s)), expected, s)
+
+#############################################################################
+
+if __name__ == '__main__':
+	unittest.main()
+
+#############################################################################